@@ -0,0 +1,30 @@
+"""add_item_keyset_indexes
+
+Revision ID: 8f3a1c2d4e5b
+Revises: 57b75b3c85a2
+Create Date: 2026-10-18 09:12:31.402118
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8f3a1c2d4e5b"
+down_revision = "57b75b3c85a2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Composite (sort column, id) indexes for keyset pagination on item listings
+    op.create_index("ix_items_name_id", "items", ["name", "id"], unique=False)
+    op.create_index("ix_items_price_id", "items", ["price", "id"], unique=False)
+    op.create_index("ix_items_abv_id", "items", ["abv", "id"], unique=False)
+    op.create_index("ix_items_created_at_id", "items", ["created_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_items_created_at_id", table_name="items")
+    op.drop_index("ix_items_abv_id", table_name="items")
+    op.drop_index("ix_items_price_id", table_name="items")
+    op.drop_index("ix_items_name_id", table_name="items")
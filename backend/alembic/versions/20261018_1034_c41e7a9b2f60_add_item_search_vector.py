@@ -0,0 +1,145 @@
+"""add_item_search_vector
+
+Revision ID: c41e7a9b2f60
+Revises: 8f3a1c2d4e5b
+Create Date: 2026-10-18 10:34:07.915246
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c41e7a9b2f60"
+down_revision = "8f3a1c2d4e5b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("items", sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True))
+    op.create_index(
+        "ix_items_search_vector", "items", ["search_vector"], unique=False, postgresql_using="gin"
+    )
+
+    # Compute the weighted document whenever an item row is written:
+    # name (A), producer (B), tag and category names (C), description (D)
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION items_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(NEW.producer, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(
+                    (SELECT string_agg(t.name, ' ')
+                     FROM item_tags it JOIN tags t ON t.id = it.tag_id
+                     WHERE it.item_id = NEW.id), '')), 'C') ||
+                setweight(to_tsvector('english', coalesce(
+                    (SELECT c.name FROM categories c WHERE c.id = NEW.category_id), '')), 'C') ||
+                setweight(to_tsvector('english', coalesce(NEW.description, '')), 'D');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER items_search_vector_trigger
+        BEFORE INSERT OR UPDATE ON items
+        FOR EACH ROW EXECUTE FUNCTION items_search_vector_update()
+        """
+    )
+
+    # Tag links change after the item row is written, so touch the affected
+    # items once per statement and let the BEFORE UPDATE trigger recompute them
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION item_tags_search_vector_refresh() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                UPDATE items SET search_vector = NULL
+                WHERE id IN (SELECT item_id FROM old_rows);
+            ELSE
+                UPDATE items SET search_vector = NULL
+                WHERE id IN (SELECT item_id FROM new_rows);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER item_tags_insert_search_vector_trigger
+        AFTER INSERT ON item_tags
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION item_tags_search_vector_refresh()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER item_tags_delete_search_vector_trigger
+        AFTER DELETE ON item_tags
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION item_tags_search_vector_refresh()
+        """
+    )
+
+    # Renaming a tag or category changes the documents of the items using it
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION tags_search_vector_refresh() RETURNS trigger AS $$
+        BEGIN
+            UPDATE items SET search_vector = NULL
+            WHERE id IN (SELECT item_id FROM item_tags WHERE tag_id = NEW.id);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER tags_search_vector_trigger
+        AFTER UPDATE OF name ON tags
+        FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+        EXECUTE FUNCTION tags_search_vector_refresh()
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION categories_search_vector_refresh() RETURNS trigger AS $$
+        BEGIN
+            UPDATE items SET search_vector = NULL WHERE category_id = NEW.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER categories_search_vector_trigger
+        AFTER UPDATE OF name ON categories
+        FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+        EXECUTE FUNCTION categories_search_vector_refresh()
+        """
+    )
+
+    # Backfill existing items through the trigger
+    op.execute("UPDATE items SET search_vector = NULL")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS categories_search_vector_trigger ON categories")
+    op.execute("DROP TRIGGER IF EXISTS tags_search_vector_trigger ON tags")
+    op.execute("DROP TRIGGER IF EXISTS item_tags_delete_search_vector_trigger ON item_tags")
+    op.execute("DROP TRIGGER IF EXISTS item_tags_insert_search_vector_trigger ON item_tags")
+    op.execute("DROP TRIGGER IF EXISTS items_search_vector_trigger ON items")
+    op.execute("DROP FUNCTION IF EXISTS categories_search_vector_refresh()")
+    op.execute("DROP FUNCTION IF EXISTS tags_search_vector_refresh()")
+    op.execute("DROP FUNCTION IF EXISTS item_tags_search_vector_refresh()")
+    op.execute("DROP FUNCTION IF EXISTS items_search_vector_update()")
+    op.drop_index("ix_items_search_vector", table_name="items")
+    op.drop_column("items", "search_vector")
@@ -0,0 +1,26 @@
+"""add_item_tags_tag_index
+
+Revision ID: 3d9b6f0e8a17
+Revises: c41e7a9b2f60
+Create Date: 2026-10-18 14:52:48.220731
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3d9b6f0e8a17"
+down_revision = "c41e7a9b2f60"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # (tag_id, item_id) lets tag filters find items without scanning item_tags
+    op.create_index(
+        "ix_item_tags_tag_id_item_id", "item_tags", ["tag_id", "item_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_item_tags_tag_id_item_id", table_name="item_tags")
@@ -0,0 +1,33 @@
+"""add_item_origin_trgm_index
+
+Revision ID: a72e5d190c4b
+Revises: 3d9b6f0e8a17
+Create Date: 2026-10-18 15:38:05.716342
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a72e5d190c4b"
+down_revision = "3d9b6f0e8a17"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Trigram index serving substring (ILIKE '%...%') and similarity (%) origin matches
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_items_origin_trgm",
+        "items",
+        ["origin"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"origin": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    # The pg_trgm extension is left installed; other objects may depend on it
+    op.drop_index("ix_items_origin_trgm", table_name="items")
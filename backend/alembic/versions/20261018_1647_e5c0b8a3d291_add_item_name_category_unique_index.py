@@ -0,0 +1,57 @@
+"""add_item_name_category_unique_index
+
+Revision ID: e5c0b8a3d291
+Revises: a72e5d190c4b
+Create Date: 2026-10-18 16:47:19.530284
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e5c0b8a3d291"
+down_revision = "a72e5d190c4b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Merge duplicate (name, category_id) items into the oldest one first:
+    # move their tag links over, then delete them
+    op.execute(
+        """
+        WITH ranked AS (
+            SELECT id, min(id) OVER (PARTITION BY name, category_id) AS keep_id
+            FROM items
+        )
+        INSERT INTO item_tags (item_id, tag_id)
+        SELECT ranked.keep_id, item_tags.tag_id
+        FROM item_tags JOIN ranked ON ranked.id = item_tags.item_id
+        WHERE ranked.id <> ranked.keep_id
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM items
+        USING (
+            SELECT id, min(id) OVER (PARTITION BY name, category_id) AS keep_id
+            FROM items
+        ) AS ranked
+        WHERE items.id = ranked.id AND ranked.id <> ranked.keep_id
+        """
+    )
+
+    # Natural key for imports; uncategorized items (NULL category) count as one group
+    op.create_index(
+        "uq_items_name_category_id",
+        "items",
+        ["name", "category_id"],
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+    )
+
+
+def downgrade() -> None:
+    # Merged duplicates are not restored
+    op.drop_index("uq_items_name_category_id", table_name="items")
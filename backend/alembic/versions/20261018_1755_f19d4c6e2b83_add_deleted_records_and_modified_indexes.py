@@ -0,0 +1,108 @@
+"""add_deleted_records_and_modified_indexes
+
+Revision ID: f19d4c6e2b83
+Revises: e5c0b8a3d291
+Create Date: 2026-10-18 17:55:42.108937
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f19d4c6e2b83"
+down_revision = "e5c0b8a3d291"
+branch_labels = None
+depends_on = None
+
+TABLES = ("categories", "tags", "items")
+
+
+def upgrade() -> None:
+    # Tombstones for delta exports: one row per deleted category, tag or item
+    op.create_table(
+        "deleted_records",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("table_name", sa.String(length=20), nullable=False),
+        sa.Column("record_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "deleted_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_deleted_records_deleted_at"), "deleted_records", ["deleted_at"], unique=False
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION record_deletions() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO deleted_records (table_name, record_id)
+            SELECT TG_TABLE_NAME, id FROM old_rows;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_record_deletions_trigger
+            AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION record_deletions()
+            """
+        )
+
+        # Rows changed since a point in time: updated_at, or created_at if never updated
+        op.create_index(
+            f"ix_{table}_modified_at",
+            table,
+            [sa.text("coalesce(updated_at, created_at)")],
+            unique=False,
+        )
+
+    # Changing an item's tags counts as changing the item
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION item_tags_search_vector_refresh() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                UPDATE items SET search_vector = NULL, updated_at = now()
+                WHERE id IN (SELECT item_id FROM old_rows);
+            ELSE
+                UPDATE items SET search_vector = NULL, updated_at = now()
+                WHERE id IN (SELECT item_id FROM new_rows);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION item_tags_search_vector_refresh() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                UPDATE items SET search_vector = NULL
+                WHERE id IN (SELECT item_id FROM old_rows);
+            ELSE
+                UPDATE items SET search_vector = NULL
+                WHERE id IN (SELECT item_id FROM new_rows);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_modified_at", table_name=table)
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_record_deletions_trigger ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS record_deletions()")
+    op.drop_index(op.f("ix_deleted_records_deleted_at"), table_name="deleted_records")
+    op.drop_table("deleted_records")
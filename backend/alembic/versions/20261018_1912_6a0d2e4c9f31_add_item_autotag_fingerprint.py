@@ -0,0 +1,48 @@
+"""add_item_autotag_fingerprint
+
+Revision ID: 6a0d2e4c9f31
+Revises: f19d4c6e2b83
+Create Date: 2026-10-18 19:12:08.374215
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "6a0d2e4c9f31"
+down_revision = "f19d4c6e2b83"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fingerprint of the fields an item was last auto-tagged from
+    op.add_column("items", sa.Column("autotag_fingerprint", sa.String(length=32), nullable=True))
+
+    # Only recompute search vectors when a column they're built from is
+    # written, so bookkeeping updates (fingerprints, prices) skip the
+    # per-row tag and category lookups; link and rename triggers set
+    # search_vector itself
+    op.execute("DROP TRIGGER IF EXISTS items_search_vector_trigger ON items")
+    op.execute(
+        """
+        CREATE TRIGGER items_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF name, producer, description, category_id, search_vector
+        ON items
+        FOR EACH ROW EXECUTE FUNCTION items_search_vector_update()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS items_search_vector_trigger ON items")
+    op.execute(
+        """
+        CREATE TRIGGER items_search_vector_trigger
+        BEFORE INSERT OR UPDATE ON items
+        FOR EACH ROW EXECUTE FUNCTION items_search_vector_update()
+        """
+    )
+    op.drop_column("items", "autotag_fingerprint")
@@ -0,0 +1,39 @@
+"""add_item_desc_keyset_indexes
+
+Revision ID: b7e4a90c1d52
+Revises: 6a0d2e4c9f31
+Create Date: 2026-10-18 20:31:47.615290
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b7e4a90c1d52"
+down_revision = "6a0d2e4c9f31"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Descending listings sort NULLs last, which the ascending (column, id)
+    # indexes of nullable columns can't serve backwards
+    op.create_index(
+        "ix_items_abv_desc_id",
+        "items",
+        [sa.text("abv DESC NULLS LAST"), sa.text("id DESC")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_items_created_at_desc_id",
+        "items",
+        [sa.text("created_at DESC NULLS LAST"), sa.text("id DESC")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_items_created_at_desc_id", table_name="items")
+    op.drop_index("ix_items_abv_desc_id", table_name="items")
@@ -1,31 +1,44 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.api.v1.endpoints.auth import get_current_user
 from app.core.database import get_db
-from app.models import Category
+from app.core.http_cache import check_menu_etag
+from app.models import Category, Item
 from app.schemas.item import CategoryCreate, CategoryResponse, CategoryUpdate
+from app.services.menu_cache import MenuCache
 
 router = APIRouter()
 
 
-@router.get("", response_model=list[CategoryResponse])
-async def get_categories(db: Session = Depends(get_db)):
+@router.get("", response_model=list[CategoryResponse], dependencies=[Depends(check_menu_etag)])
+async def get_categories(db: AsyncSession = Depends(get_db)):
     """
     Get all categories.
     Public endpoint.
     """
-    categories = db.query(Category).order_by(Category.sort_order, Category.name).all()
-    return categories
+    menu_version = MenuCache.version()
+    cached = MenuCache.get(menu_version, "categories")
+    if cached is not None:
+        return cached
+
+    categories = list(
+        await db.scalars(select(Category).order_by(Category.sort_order, Category.name))
+    )
+    response = [CategoryResponse.model_validate(category) for category in categories]
+    MenuCache.set(menu_version, "categories", response)
+    return response
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-async def get_category(category_id: int, db: Session = Depends(get_db)):
+async def get_category(category_id: int, db: AsyncSession = Depends(get_db)):
     """
     Get a single category by ID.
     Public endpoint.
     """
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.scalar(select(Category).where(Category.id == category_id))
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
@@ -35,21 +48,22 @@ async def get_category(category_id: int, db: Session = Depends(get_db)):
 async def create_category(
     category_data: CategoryCreate,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Create a new category.
     Admin only.
     """
     # Check if slug already exists
-    existing = db.query(Category).filter(Category.slug == category_data.slug).first()
+    existing = await db.scalar(select(Category).where(Category.slug == category_data.slug))
     if existing:
         raise HTTPException(status_code=400, detail="Category slug already exists")
 
     category = Category(**category_data.model_dump())
     db.add(category)
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    MenuCache.bump()
+    await db.refresh(category)
     return category
 
 
@@ -58,19 +72,19 @@ async def update_category(
     category_id: int,
     category_data: CategoryUpdate,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Update an existing category.
     Admin only.
     """
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.scalar(select(Category).where(Category.id == category_id))
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
 
     # Check slug uniqueness if being updated
     if category_data.slug and category_data.slug != category.slug:
-        existing = db.query(Category).filter(Category.slug == category_data.slug).first()
+        existing = await db.scalar(select(Category).where(Category.slug == category_data.slug))
         if existing:
             raise HTTPException(status_code=400, detail="Category slug already exists")
 
@@ -79,8 +93,9 @@ async def update_category(
     for field, value in update_data.items():
         setattr(category, field, value)
 
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    MenuCache.bump()
+    await db.refresh(category)
     return category
 
 
@@ -88,16 +103,22 @@ async def update_category(
 async def delete_category(
     category_id: int,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Delete a category.
     Admin only.
     """
-    category = db.query(Category).filter(Category.id == category_id).first()
+    # Items (and their tag links) are loaded so the delete can cascade to them
+    category = await db.scalar(
+        select(Category)
+        .options(selectinload(Category.items).selectinload(Item.tags))
+        .where(Category.id == category_id)
+    )
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    db.delete(category)
-    db.commit()
+    await db.delete(category)
+    await db.commit()
+    MenuCache.bump()
     return {"message": "Category deleted successfully"}
@@ -1,329 +1,425 @@
+import asyncio
+import shutil
+import tempfile
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.endpoints.auth import get_current_user
-from app.core.database import get_db
-from app.models import Category, Item, Tag
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
+from app.core.responses import FastJSONResponse, dump_json
+from app.models import Category, DeletedRecord, Item, Tag, item_tags
+from app.services.data_import import (
+    DataImportService,
+    ImportConflictError,
+    RecordImport,
+    payload_records,
+)
+from app.services.deleted_records import DeletedRecordService
+from app.services.import_jobs import ImportJobs
+from app.services.import_reader import ImportFileError, record_chunks
+from app.services.import_validation import ImportValidator, ValidationReport
+from app.services.menu_cache import MenuCache
 
 router = APIRouter()
 
 
+# Columns written to exports, in output order
+EXPORT_CATEGORY_COLUMNS = (
+    Category.id,
+    Category.name,
+    Category.slug,
+    Category.description,
+    Category.icon,
+    Category.sort_order,
+)
+EXPORT_TAG_COLUMNS = (Tag.id, Tag.name, Tag.slug, Tag.description, Tag.color)
+EXPORT_ITEM_COLUMNS = (
+    Item.id,
+    Item.name,
+    Item.description,
+    Item.category_id,
+    Item.price,
+    Item.abv,
+    Item.volume,
+    Item.origin,
+    Item.producer,
+    Item.is_published,
+    Item.sort_order,
+    Item.image_url,
+)
+
+EXPORT_VERSION = "1.0"
+
+# Rows fetched from the server-side cursor per streamed chunk
+EXPORT_CHUNK_SIZE = 1000
+
+
+def _changed_since(model, since: datetime | None):
+    """
+    Filter rows created or updated after since; every row if since is None.
+    """
+    if since is None:
+        return true()
+    return func.coalesce(model.updated_at, model.created_at) > since
+
+
+def _deleted_since(since: datetime):
+    """
+    Select (table name, id) of the rows deleted after since, oldest first.
+    """
+    return (
+        select(DeletedRecord.table_name, DeletedRecord.record_id)
+        .where(DeletedRecord.deleted_at > since)
+        .order_by(DeletedRecord.id)
+    )
+
+
+async def _stream_export(exported_at: datetime, since: datetime | None) -> AsyncIterator[bytes]:
+    """
+    Yield the export as NDJSON, one {"type": ..., "data": ...} record per line.
+
+    Rows are read through server-side cursors in EXPORT_CHUNK_SIZE chunks and
+    item tag ids are loaded per chunk, so memory use does not grow with the
+    size of the catalogue.
+    """
+    # The stream outlives the request handler, so it uses its own session
+    async with SessionLocal() as db:
+        meta = {"version": EXPORT_VERSION, "export_date": exported_at}
+        if since is not None:
+            meta["since"] = since
+        yield dump_json({"type": "meta", "data": meta}) + b"\n"
+
+        # Deletions first, so a client applying records in order can re-create ids
+        if since is not None:
+            result = await db.stream(
+                _deleted_since(since).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+            )
+            async for rows in result.partitions():
+                yield b"".join(
+                    dump_json({"type": "deleted", "data": {"table": table, "id": record_id}})
+                    + b"\n"
+                    for table, record_id in rows
+                )
+
+        for record_type, model, columns in (
+            ("category", Category, EXPORT_CATEGORY_COLUMNS),
+            ("tag", Tag, EXPORT_TAG_COLUMNS),
+        ):
+            result = await db.stream(
+                select(*columns)
+                .where(_changed_since(model, since))
+                .order_by(columns[0])
+                .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+            )
+            async for rows in result.mappings().partitions():
+                yield b"".join(
+                    dump_json({"type": record_type, "data": dict(row)}) + b"\n" for row in rows
+                )
+
+        result = await db.stream(
+            select(*EXPORT_ITEM_COLUMNS)
+            .where(_changed_since(Item, since))
+            .order_by(Item.id)
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        async for rows in result.mappings().partitions():
+            item_tag_ids: dict[int, list[int]] = {}
+            tag_rows = await db.execute(
+                select(item_tags.c.item_id, item_tags.c.tag_id).where(
+                    item_tags.c.item_id.in_([row["id"] for row in rows])
+                )
+            )
+            for item_id, tag_id in tag_rows:
+                item_tag_ids.setdefault(item_id, []).append(tag_id)
+
+            lines = []
+            for row in rows:
+                item = dict(row)
+                item["tag_ids"] = item_tag_ids.get(item["id"], [])
+                lines.append(dump_json({"type": "item", "data": item}) + b"\n")
+            yield b"".join(lines)
+
+
 @router.get("/export")
 async def export_data(
+    format: str = Query("json", regex="^(json|ndjson)$"),
+    since: datetime | None = None,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Export all database data (categories, tags, items).
     Admin only.
     Returns JSON with all data for backup/migration.
+
+    Set format=ndjson to stream the export as newline-delimited JSON records
+    instead, keeping memory flat for large catalogues.
+
+    Pass since (e.g. the export_date of the previous export) to export only
+    rows created or changed after it, plus the ids of rows deleted after it
+    under "deleted". Rows written by transactions still open during an export
+    carry earlier timestamps, so syncing clients should pass a since slightly
+    before the previous export_date; re-importing a row is harmless.
+
+    Deletions are only recorded for DELETED_RECORDS_RETENTION_DAYS, so a since
+    further back is rejected (400) and the client needs a full export instead.
     """
-    # Get all categories
-    categories = db.query(Category).all()
+    # Database time, the clock that stamps created_at, updated_at and deletions
+    exported_at = await db.scalar(select(func.now()))
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=UTC)
+    if since is not None and since < DeletedRecordService.retention_start(exported_at):
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"since is older than the {settings.DELETED_RECORDS_RETENTION_DAYS} days of "
+                "deletions kept; run a full export without since instead"
+            ),
+        )
+    await DeletedRecordService.prune(db)
+    await db.commit()
+
+    if format == "ndjson":
+        filename = f"drinklink-export-{exported_at:%Y%m%dT%H%M%SZ}.ndjson"
+        return StreamingResponse(
+            _stream_export(exported_at, since),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    # Read plain rows rather than ORM objects; nothing here needs an identity map
     categories_data = [
-        {
-            "id": c.id,
-            "name": c.name,
-            "slug": c.slug,
-            "description": c.description,
-            "icon": c.icon,
-            "sort_order": c.sort_order,
-        }
-        for c in categories
+        dict(row)
+        for row in (
+            await db.execute(
+                select(*EXPORT_CATEGORY_COLUMNS).where(_changed_since(Category, since))
+            )
+        ).mappings()
     ]
-
-    # Get all tags
-    tags = db.query(Tag).all()
     tags_data = [
-        {
-            "id": t.id,
-            "name": t.name,
-            "slug": t.slug,
-            "description": t.description,
-            "color": t.color,
-        }
-        for t in tags
+        dict(row)
+        for row in (
+            await db.execute(select(*EXPORT_TAG_COLUMNS).where(_changed_since(Tag, since)))
+        ).mappings()
     ]
 
-    # Get all items with their relationships
-    items = db.query(Item).all()
-    items_data = [
-        {
-            "id": i.id,
-            "name": i.name,
-            "description": i.description,
-            "category_id": i.category_id,
-            "price": i.price,
-            "abv": i.abv,
-            "volume": i.volume,
-            "origin": i.origin,
-            "producer": i.producer,
-            "is_published": i.is_published,
-            "sort_order": i.sort_order,
-            "image_url": i.image_url,
-            "tag_ids": [t.id for t in i.tags],
-        }
-        for i in items
-    ]
-
-    return {
-        "version": "1.0",
-        "export_date": "2025-11-19",
-        "categories": categories_data,
-        "tags": tags_data,
-        "items": items_data,
-    }
+    # Load the exported items' tag ids in one query
+    item_tag_ids: dict[int, list[int]] = {}
+    tag_query = select(item_tags.c.item_id, item_tags.c.tag_id)
+    if since is not None:
+        tag_query = tag_query.where(
+            item_tags.c.item_id.in_(select(Item.id).where(_changed_since(Item, since)))
+        )
+    for item_id, tag_id in await db.execute(tag_query):
+        item_tag_ids.setdefault(item_id, []).append(tag_id)
+
+    items_data = []
+    for row in (
+        await db.execute(select(*EXPORT_ITEM_COLUMNS).where(_changed_since(Item, since)))
+    ).mappings():
+        item = dict(row)
+        item["tag_ids"] = item_tag_ids.get(item["id"], [])
+        items_data.append(item)
+
+    export: dict[str, Any] = {"version": EXPORT_VERSION, "export_date": exported_at}
+    # Deletions go first, so file imports reading in order can re-create ids
+    if since is not None:
+        deleted: dict[str, list[int]] = {"categories": [], "tags": [], "items": []}
+        for table, record_id in await db.execute(_deleted_since(since)):
+            deleted[table].append(record_id)
+        export["since"] = since
+        export["deleted"] = deleted
+    export["categories"] = categories_data
+    export["tags"] = tags_data
+    export["items"] = items_data
+
+    return FastJSONResponse(export)
+
+
+def _raise_if_invalid(report: ValidationReport) -> None:
+    """
+    Fail an import whose rows don't validate with a 422 listing the errors.
+    """
+    if not report.valid:
+        raise HTTPException(status_code=422, detail=report.detail())
 
 
 @router.post("/import")
 async def import_data(
     data: dict[Any, Any],
+    response: Response,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     clear_existing: bool = False,
+    background: bool = False,
+    dry_run: bool = False,
 ):
     """
     Import data from export.
     Admin only.
 
+    Every row is validated before anything is written; if any fails, the
+    response is a 422 listing the errors of each invalid row. Rows that
+    would give an item the name and category of another item fail the
+    import with a 422 listing them too.
+
     Set clear_existing=true to delete all existing data first.
-    Otherwise, will skip items with duplicate IDs.
-    """
-    try:
-        # Clear existing data if requested
-        if clear_existing:
-            db.query(Item).delete()
-            db.query(Tag).delete()
-            db.query(Category).delete()
-            db.commit()
-
-        # Import categories
-        category_map = {}
-        for cat_data in data.get("categories", []):
-            existing = db.query(Category).filter(Category.id == cat_data["id"]).first()
-            if not existing:
-                category = Category(
-                    id=cat_data["id"],
-                    name=cat_data["name"],
-                    slug=cat_data["slug"],
-                    description=cat_data.get("description"),
-                    icon=cat_data.get("icon"),
-                    sort_order=cat_data.get("sort_order", 0),
-                )
-                db.add(category)
-                category_map[cat_data["id"]] = category
+    Otherwise, rows matching existing ones are updated if their content
+    changed and skipped if not.
+
+    Set background=true to run the import as a background job instead; the
+    response (202) carries a job_id to poll at /data/import/{job_id}.
 
-        db.commit()
+    Set dry_run=true to write nothing and return the changeset instead: the
+    categories, tags and items the import would insert, update, leave
+    unchanged or delete, and existing rows it doesn't mention (orphaned).
+    """
+    _raise_if_invalid(
+        ImportValidator.validate_payload(data)
+        or await ImportValidator.validate(payload_records(data))
+    )
 
-        # Fix PostgreSQL sequence for categories table
+    if dry_run:
         try:
-            db.execute("SELECT setval('categories_id_seq', (SELECT MAX(id) FROM categories), true)")
-            db.commit()
-        except Exception:
-            pass
+            changeset = await DataImportService.dry_run(db, data, clear_existing=clear_existing)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Dry run failed: {str(e)}") from e
+        finally:
+            await db.rollback()
+        return {"success": True, "dry_run": True, **changeset}
+
+    if background:
+        job = ImportJobs.start(data, clear_existing=clear_existing)
+        response.status_code = 202
+        return job.snapshot()
 
-        # Import tags
-        tag_map = {}
-        for tag_data in data.get("tags", []):
-            existing = db.query(Tag).filter(Tag.id == tag_data["id"]).first()
-            if not existing:
-                tag = Tag(
-                    id=tag_data["id"],
-                    name=tag_data["name"],
-                    slug=tag_data["slug"],
-                    description=tag_data.get("description"),
-                    color=tag_data.get("color", "#3B82F6"),
-                )
-                db.add(tag)
-                tag_map[tag_data["id"]] = tag
+    try:
+        result = await DataImportService.run(db, data, clear_existing=clear_existing)
+        MenuCache.bump()
 
-        db.commit()
+        return {
+            "success": True,
+            "message": "Data imported successfully",
+            **result,
+        }
 
-        # Fix PostgreSQL sequence for tags table
-        try:
-            db.execute("SELECT setval('tags_id_seq', (SELECT MAX(id) FROM tags), true)")
-            db.commit()
-        except Exception:
-            pass
+    except ImportConflictError as e:
+        await db.rollback()
+        raise HTTPException(status_code=422, detail=e.detail()) from e
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}") from e
 
-        # Fix PostgreSQL sequence for items BEFORE importing
-        # This prevents ID conflicts when auto-generating IDs
-        try:
-            db.execute(
-                "SELECT setval('items_id_seq', (SELECT COALESCE(MAX(id), 0) FROM items), true)"
-            )
-            db.commit()
-        except Exception:
-            pass
 
-        # Import items
-        items_imported = 0
-        items_updated = 0
-        for item_data in data.get("items", []):
-            # Check if item has an ID
-            if "id" in item_data and item_data["id"]:
-                # Update existing item or skip if not found
-                existing = db.query(Item).filter(Item.id == item_data["id"]).first()
-                if existing:
-                    # Update existing item
-                    existing.name = item_data["name"]
-                    existing.description = item_data.get("description")
-                    existing.category_id = item_data.get("category_id")
-                    existing.price = item_data["price"]
-                    existing.abv = item_data.get("abv")
-                    existing.volume = item_data.get("volume")
-                    existing.origin = item_data.get("origin")
-                    existing.producer = item_data.get("producer")
-                    existing.is_published = item_data.get("is_published", True)
-                    existing.sort_order = item_data.get("sort_order", 0)
-                    existing.image_url = item_data.get("image_url")
-
-                    # Update tags
-                    if "tag_ids" in item_data:
-                        tags = db.query(Tag).filter(Tag.id.in_(item_data["tag_ids"])).all()
-                        existing.tags = tags
-
-                    items_updated += 1
-                else:
-                    # Create new item with specified ID
-                    item = Item(
-                        id=item_data["id"],
-                        name=item_data["name"],
-                        description=item_data.get("description"),
-                        category_id=item_data.get("category_id"),
-                        price=item_data["price"],
-                        abv=item_data.get("abv"),
-                        volume=item_data.get("volume"),
-                        origin=item_data.get("origin"),
-                        producer=item_data.get("producer"),
-                        is_published=item_data.get("is_published", True),
-                        sort_order=item_data.get("sort_order", 0),
-                        image_url=item_data.get("image_url"),
-                    )
-
-                    # Add tags
-                    if "tag_ids" in item_data:
-                        tags = db.query(Tag).filter(Tag.id.in_(item_data["tag_ids"])).all()
-                        item.tags = tags
-
-                    db.add(item)
-                    items_imported += 1
-            else:
-                # Create new item without ID (auto-generated)
-                # Resolve category by name if category_id not provided
-                category_id = item_data.get("category_id")
-                if not category_id and "category" in item_data:
-                    category = (
-                        db.query(Category).filter(Category.name == item_data["category"]).first()
-                    )
-                    if category:
-                        category_id = category.id
-
-                # Check if item already exists by name and category
-                existing_by_name = (
-                    db.query(Item)
-                    .filter(Item.name == item_data["name"], Item.category_id == category_id)
-                    .first()
-                )
+@router.post("/import/upload")
+async def import_upload(
+    response: Response,
+    file: UploadFile = File(...),
+    current_user: str = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    clear_existing: bool = False,
+    background: bool = False,
+    dry_run: bool = False,
+):
+    """
+    Import an uploaded export file: NDJSON (as written by format=ndjson) or
+    the JSON export, optionally gzip- or zstd-compressed.
+    Admin only.
 
-                if existing_by_name:
-                    # Update existing item instead of creating duplicate
-                    existing_by_name.description = item_data.get("description")
-                    existing_by_name.price = item_data.get("price", 0.0)
-                    existing_by_name.abv = item_data.get("abv")
-                    existing_by_name.volume = item_data.get("volume")
-                    existing_by_name.origin = item_data.get("origin")
-                    existing_by_name.producer = item_data.get("producer")
-                    existing_by_name.is_published = item_data.get("is_published", True)
-                    existing_by_name.sort_order = item_data.get("sort_order", 0)
-                    existing_by_name.image_url = item_data.get("image_url")
-
-                    # Update tags
-                    if "tag_ids" in item_data:
-                        tags = db.query(Tag).filter(Tag.id.in_(item_data["tag_ids"])).all()
-                        existing_by_name.tags = tags
-                    elif "tags" in item_data:
-                        tag_names = item_data["tags"]
-                        tags = db.query(Tag).filter(Tag.name.in_(tag_names)).all()
-                        existing_by_name.tags = tags
-
-                    items_updated += 1
-                    continue
-
-                item = Item(
-                    name=item_data["name"],
-                    description=item_data.get("description"),
-                    category_id=category_id,
-                    price=item_data.get("price", 0.0),
-                    abv=item_data.get("abv"),
-                    volume=item_data.get("volume"),
-                    origin=item_data.get("origin"),
-                    producer=item_data.get("producer"),
-                    is_published=item_data.get("is_published", True),
-                    sort_order=item_data.get("sort_order", 0),
-                    image_url=item_data.get("image_url"),
-                )
+    Records are parsed incrementally and imported in batches, so memory use
+    is bounded by the batch size rather than the file size.
+    Set background=true to run the import as a background job, or
+    dry_run=true to return the changeset without writing, as for /data/import.
+    Rows are validated before anything is written, as for /data/import.
+    """
+    try:
+        _raise_if_invalid(await ImportValidator.validate(record_chunks(file.file)))
+    except ImportFileError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
-                # Resolve tags by name if tag_ids not provided
-                if "tag_ids" in item_data:
-                    tags = db.query(Tag).filter(Tag.id.in_(item_data["tag_ids"])).all()
-                    item.tags = tags
-                elif "tags" in item_data:
-                    # Look up tags by name
-                    tag_names = item_data["tags"]
-                    tags = db.query(Tag).filter(Tag.name.in_(tag_names)).all()
-                    item.tags = tags
-
-                db.add(item)
-                try:
-                    db.flush()  # Force ID generation
-                    items_imported += 1
-                except IntegrityError:
-                    # ID conflict - sequence out of sync, update instead
-                    db.rollback()
-                    existing_conflict = (
-                        db.query(Item)
-                        .filter(
-                            Item.name == item_data["name"],
-                            Item.category_id == category_id,
-                        )
-                        .first()
-                    )
-                    if existing_conflict:
-                        existing_conflict.description = item_data.get("description")
-                        existing_conflict.price = item_data.get("price", 0.0)
-                        existing_conflict.abv = item_data.get("abv")
-                        existing_conflict.volume = item_data.get("volume")
-                        existing_conflict.origin = item_data.get("origin")
-                        existing_conflict.producer = item_data.get("producer")
-                        existing_conflict.is_published = item_data.get("is_published", True)
-                        existing_conflict.sort_order = item_data.get("sort_order", 0)
-                        existing_conflict.image_url = item_data.get("image_url")
-
-                        if "tag_ids" in item_data:
-                            tags = db.query(Tag).filter(Tag.id.in_(item_data["tag_ids"])).all()
-                            existing_conflict.tags = tags
-                        elif "tags" in item_data:
-                            tag_names = item_data["tags"]
-                            tags = db.query(Tag).filter(Tag.name.in_(tag_names)).all()
-                            existing_conflict.tags = tags
-
-                        items_updated += 1
-
-        db.commit()
+    if dry_run:
+        importer = RecordImport(db, clear_existing, dry_run=True)
+        try:
+            async for _ in importer.run(record_chunks(file.file)):
+                pass
+        except ImportFileError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Dry run failed: {str(e)}") from e
+        finally:
+            await db.rollback()
+        return {"success": True, "dry_run": True, **importer.changeset.report()}
+
+    if background:
+        # The upload is discarded after the request, so the job gets its own copy
+        file.file.seek(0)
+        with tempfile.NamedTemporaryFile(suffix=".import", delete=False) as copy:
+            await asyncio.to_thread(shutil.copyfileobj, file.file, copy)
+        job = ImportJobs.start_file(copy.name, clear_existing=clear_existing)
+        response.status_code = 202
+        return job.snapshot()
+
+    importer = RecordImport(db, clear_existing)
+    try:
+        async for _ in importer.run(record_chunks(file.file)):
+            pass
+        MenuCache.bump()
 
         return {
             "success": True,
             "message": "Data imported successfully",
-            "categories_imported": len(data.get("categories", [])),
-            "tags_imported": len(data.get("tags", [])),
-            "items_imported": items_imported,
-            "items_updated": items_updated,
+            **importer.counts(),
         }
 
+    except ImportFileError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except ImportConflictError as e:
+        await db.rollback()
+        raise HTTPException(status_code=422, detail=e.detail()) from e
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}") from e
+
+
+@router.get("/import/{job_id}")
+async def get_import_job(
+    job_id: str,
+    current_user: str = Depends(get_current_user),  # noqa: ARG001
+):
+    """
+    Report a background import's progress: rows processed, throughput,
+    errors and estimated time remaining.
+    Admin only.
+    """
+    job = ImportJobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job.snapshot()
+
+
+@router.post("/import/{job_id}/cancel")
+async def cancel_import_job(
+    job_id: str,
+    current_user: str = Depends(get_current_user),  # noqa: ARG001
+):
+    """
+    Cancel a background import after the item batch in progress.
+    Batches already committed are kept.
+    Admin only.
+    """
+    job = ImportJobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    if job.finished:
+        raise HTTPException(status_code=400, detail="Import job already finished")
+
+    ImportJobs.cancel(job_id)
+    return job.snapshot()
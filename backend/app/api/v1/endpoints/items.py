@@ -1,87 +1,283 @@
+import re
+from collections import Counter
+from datetime import datetime
 from math import ceil
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import Float, and_, cast, func, or_, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.api.v1.endpoints.auth import get_current_user
+from app.core.config import settings
 from app.core.database import get_db
-from app.models import Item, Tag
-from app.schemas.item import ItemCreate, ItemListResponse, ItemResponse, ItemUpdate
+from app.core.http_cache import check_menu_etag
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.responses import FastJSONResponse, dump_json
+from app.models import Item, Tag, item_tags
+from app.schemas.item import (
+    ItemBatchRequest,
+    ItemCreate,
+    ItemListResponse,
+    ItemResponse,
+    ItemUpdate,
+    TagSuggestionBatchRequest,
+)
+from app.schemas.serializers import item_to_dict, tag_to_dict
+from app.services.auto_tagging import AutoTaggingService
 from app.services.drink_search import DrinkDatabaseService
+from app.services.item_batch import ItemBatchService
+from app.services.menu_cache import MenuCache
+from app.services.tag_similarity import SimilarTagSuggester
 from app.services.tag_suggestion import TagSuggestionService
 
 router = APIRouter()
 
+DUPLICATE_ITEM_DETAIL = "An item with this name already exists in this category"
 
-@router.get("", response_model=ItemListResponse)
+
+async def _load_item(db: AsyncSession, item_id: int) -> Item | None:
+    """Load an item with its category and tags eagerly loaded for the response."""
+    result = await db.execute(
+        select(Item)
+        .options(joinedload(Item.category), selectinload(Item.tags))
+        .where(Item.id == item_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+
+async def _name_taken(db: AsyncSession, name: str, category_id: int | None) -> bool:
+    """Check whether an item with this name exists in the category (or uncategorized)."""
+    existing = await db.scalar(
+        select(Item.id).where(Item.name == name, Item.category_id.is_not_distinct_from(category_id))
+    )
+    return existing is not None
+
+
+async def _commit_item(db: AsyncSession) -> None:
+    """
+    Commit an item write, answering 409 if a concurrent request took the
+    item's name and category after _name_taken checked them.
+    """
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if getattr(e.orig, "sqlstate", None) != "23505":
+            raise
+        raise HTTPException(status_code=409, detail=DUPLICATE_ITEM_DETAIL) from e
+
+
+def _search_tsquery(search: str):
+    """
+    Build a prefix-matching full-text query from free-form search input, so
+    partially typed words ("caber") still match ("Cabernet").
+    Returns None if the input has no searchable words.
+    """
+    terms = re.findall(r"\w+", search)
+    if not terms:
+        return None
+    return func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+
+
+def _seek_ranges(cursor: str, sort_by: str, sort_order: str, sort_column, nullable: bool):
+    """
+    Build the keyset filters selecting rows after the cursor position, one per
+    range of the (sort column NULLS LAST, id) ordering used by get_items, to
+    query in turn: the rest of the non-NULL values, then the NULL tail.
+
+    Non-NULL positions compare as (sort column, id) row values, so the
+    composite index seeks straight to the cursor.
+    """
+    try:
+        position = decode_cursor(cursor)
+        last_id = int(position["id"])
+        last_value = position["value"]
+        if last_value is not None:
+            if sort_by == "created_at":
+                last_value = datetime.fromisoformat(last_value)
+            elif sort_by in ("price", "abv", "relevance"):
+                last_value = float(last_value)
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+    if position.get("sort_by") != sort_by or position.get("sort_order") != sort_order:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+
+    # Past the last non-NULL value only the NULL tail remains
+    if last_value is None:
+        id_after = Item.id < last_id if sort_order == "desc" else Item.id > last_id
+        return [and_(sort_column.is_(None), id_after)]
+
+    seek_position = tuple_(sort_column, Item.id)
+    if sort_order == "desc":
+        ranges = [seek_position < tuple_(last_value, last_id)]
+    else:
+        ranges = [seek_position > tuple_(last_value, last_id)]
+    if nullable:
+        ranges.append(sort_column.is_(None))
+    return ranges
+
+
+@router.get("", response_model=ItemListResponse, dependencies=[Depends(check_menu_etag)])
 async def get_items(
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    with_total: bool = True,
     category_id: int | None = None,
     tag_ids: str | None = None,  # Comma-separated tag IDs
+    tag_match: str = Query("all", regex="^(all|any)$"),
     origin: str | None = None,
     search: str | None = None,
-    sort_by: str = Query("name", regex="^(name|price|abv|created_at)$"),
+    sort_by: str = Query("name", regex="^(name|price|abv|created_at|relevance)$"),
     sort_order: str = Query("asc", regex="^(asc|desc)$"),
     published_only: bool = True,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Get paginated list of menu items with filtering and sorting.
     Public endpoint - only returns published items by default.
+
+    Pass the returned next_cursor as `cursor` to fetch the following page by
+    seeking past the last item instead of using an offset (page is ignored).
+    Set with_total=false to skip counting the full result set.
+
+    tag_match=all (default) returns items carrying every tag in tag_ids,
+    tag_match=any returns items carrying at least one of them.
+
+    sort_by=relevance ranks full-text search matches best first; without a
+    search term it falls back to sorting by name.
     """
-    query = db.query(Item)
+    # Serve the public menu from the in-process cache when possible
+    menu_version = MenuCache.version()
+    cache_key = None
+    if published_only:
+        cache_key = (
+            "items",
+            page,
+            page_size,
+            cursor,
+            with_total,
+            category_id,
+            tag_ids,
+            tag_match,
+            origin,
+            search,
+            sort_by,
+            sort_order,
+        )
+        cached = MenuCache.get(menu_version, cache_key)
+        if cached is not None:
+            return FastJSONResponse(cached, headers=response.headers)
+
+    # Load categories and tags up front so serialization doesn't lazy-load per row
+    query = select(Item).options(joinedload(Item.category), selectinload(Item.tags))
 
     # Filter by published status
     if published_only:
-        query = query.filter(Item.is_published)
+        query = query.where(Item.is_published)
 
     # Filter by category
     if category_id:
-        query = query.filter(Item.category_id == category_id)
+        query = query.where(Item.category_id == category_id)
 
-    # Filter by tags (items must have ALL specified tags)
+    # Filter by tags in one set operation over item_tags:
+    # items having ALL of the tags (default) or ANY of them
     if tag_ids:
-        tag_id_list = [int(tid) for tid in tag_ids.split(",") if tid.strip()]
-        for tag_id in tag_id_list:
-            query = query.filter(Item.tags.any(Tag.id == tag_id))
-
-    # Filter by origin
+        try:
+            tag_id_list = {int(tid) for tid in tag_ids.split(",") if tid.strip()}
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400, detail="tag_ids must be comma-separated integers"
+            ) from e
+        if tag_id_list:
+            matching_items = select(item_tags.c.item_id).where(item_tags.c.tag_id.in_(tag_id_list))
+            if tag_match == "all":
+                matching_items = matching_items.group_by(item_tags.c.item_id).having(
+                    func.count() == len(tag_id_list)
+                )
+            query = query.where(Item.id.in_(matching_items))
+
+    # Filter by origin - substring or trigram similarity (tolerates typos),
+    # both served by the ix_items_origin_trgm index
     if origin:
-        query = query.filter(Item.origin.ilike(f"%{origin}%"))
-
-    # Search in name, description, producer
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Item.name.ilike(search_term),
-                Item.description.ilike(search_term),
-                Item.producer.ilike(search_term),
-            )
-        )
+        query = query.where(or_(Item.origin.ilike(f"%{origin}%"), Item.origin.op("%")(origin)))
 
-    # Sorting
-    if sort_order == "desc":
-        query = query.order_by(getattr(Item, sort_by).desc())
-    else:
-        query = query.order_by(getattr(Item, sort_by).asc())
+    # Full-text search over name, producer, tags, category and description
+    ts_query = _search_tsquery(search) if search else None
+    if ts_query is not None:
+        query = query.where(Item.search_vector.op("@@")(ts_query))
 
     # Get total count before pagination
-    total = query.count()
-
-    # Pagination
-    offset = (page - 1) * page_size
-    items = query.offset(offset).limit(page_size).all()
-
-    return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "pages": ceil(total / page_size) if total > 0 else 0,
-    }
+    total = None
+    if with_total:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+    # Sorting - id breaks ties so keyset pages are stable, NULLs always sort last
+    if sort_by == "relevance" and ts_query is None:
+        sort_by = "name"
+    if sort_by == "relevance":
+        sort_order = "desc"
+        # Rank as double precision so cursor values round-trip exactly
+        sort_column = cast(func.ts_rank_cd(Item.search_vector, ts_query), Float)
+        nullable = False
+    else:
+        sort_column = getattr(Item, sort_by)
+        nullable = Item.__table__.c[sort_by].nullable
+    query = query.add_columns(sort_column.label("sort_value"))
+    if sort_order == "desc":
+        # Matches the (column DESC NULLS LAST, id DESC) indexes of nullable
+        # columns, and scans the others' indexes backwards
+        query = query.order_by(
+            sort_column.desc().nulls_last() if nullable else sort_column.desc(), Item.id.desc()
+        )
+    else:
+        query = query.order_by(sort_column.asc(), Item.id.asc())
+
+    # Pagination - fetch one extra row to know whether another page follows
+    if cursor:
+        rows = []
+        for seek in _seek_ranges(cursor, sort_by, sort_order, sort_column, nullable):
+            rows += (await db.execute(query.where(seek).limit(page_size + 1 - len(rows)))).all()
+            if len(rows) > page_size:
+                break
+    else:
+        rows = (await db.execute(query.offset((page - 1) * page_size).limit(page_size + 1))).all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last_item, last_value = rows[-1]
+        next_cursor = encode_cursor(
+            {
+                "sort_by": sort_by,
+                "sort_order": sort_order,
+                "value": last_value,
+                "id": last_item.id,
+            }
+        )
+    pages = None
+    if total is not None:
+        pages = ceil(total / page_size) if total > 0 else 0
+
+    # Serialize plain dicts with orjson instead of validating through ItemListResponse
+    body = dump_json(
+        {
+            "items": [item_to_dict(item) for item, _ in rows],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "pages": pages,
+            "next_cursor": next_cursor,
+        }
+    )
+    if cache_key is not None:
+        MenuCache.set(menu_version, cache_key, body)
+    return FastJSONResponse(body, headers=response.headers)
 
 
 @router.get("/search-database")
@@ -98,13 +294,13 @@ async def search_drink_database(
     return {"results": results, "total": len(results)}
 
 
-@router.get("/{item_id}", response_model=ItemResponse)
-async def get_item(item_id: int, db: Session = Depends(get_db)):
+@router.get("/{item_id}", response_model=ItemResponse, dependencies=[Depends(check_menu_etag)])
+async def get_item(item_id: int, db: AsyncSession = Depends(get_db)):
     """
     Get a single item by ID.
     Public endpoint.
     """
-    item = db.query(Item).filter(Item.id == item_id).first()
+    item = await _load_item(db, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     return item
@@ -114,24 +310,32 @@ async def get_item(item_id: int, db: Session = Depends(get_db)):
 async def create_item(
     item_data: ItemCreate,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Create a new menu item.
     Admin only.
+
+    With AUTO_TAG_ON_WRITE set, suggested tags are added to the new item.
     """
+    # Check if the category already has an item with this name
+    if await _name_taken(db, item_data.name, item_data.category_id):
+        raise HTTPException(status_code=409, detail=DUPLICATE_ITEM_DETAIL)
+
     # Create item
     item = Item(**item_data.model_dump(exclude={"tag_ids"}))
 
     # Add tags if provided
     if item_data.tag_ids:
-        tags = db.query(Tag).filter(Tag.id.in_(item_data.tag_ids)).all()
-        item.tags = tags
+        tags = await db.scalars(select(Tag).where(Tag.id.in_(item_data.tag_ids)))
+        item.tags = list(tags)
 
     db.add(item)
-    db.commit()
-    db.refresh(item)
-    return item
+    await _commit_item(db)
+    if settings.AUTO_TAG_ON_WRITE:
+        await AutoTaggingService.run(db, incremental=True, item_ids=[item.id])
+    MenuCache.bump()
+    return await _load_item(db, item.id)
 
 
 @router.put("/{item_id}", response_model=ItemResponse)
@@ -139,97 +343,244 @@ async def update_item(
     item_id: int,
     item_data: ItemUpdate,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Update an existing menu item.
     Admin only.
+
+    With AUTO_TAG_ON_WRITE set, suggested tags are added when the name,
+    description, ABV or origin changes.
     """
-    item = db.query(Item).filter(Item.id == item_id).first()
+    item = await db.scalar(select(Item).options(selectinload(Item.tags)).where(Item.id == item_id))
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
     # Update fields
     update_data = item_data.model_dump(exclude_unset=True, exclude={"tag_ids"})
+
+    # Check name uniqueness within the category if either is being updated
+    name = update_data.get("name", item.name)
+    category_id = update_data.get("category_id", item.category_id)
+    if (name, category_id) != (item.name, item.category_id) and await _name_taken(
+        db, name, category_id
+    ):
+        raise HTTPException(status_code=409, detail=DUPLICATE_ITEM_DETAIL)
+
     for field, value in update_data.items():
         setattr(item, field, value)
 
     # Update tags if provided
     if item_data.tag_ids is not None:
-        tags = db.query(Tag).filter(Tag.id.in_(item_data.tag_ids)).all()
-        item.tags = tags
+        tags = await db.scalars(select(Tag).where(Tag.id.in_(item_data.tag_ids)))
+        item.tags = list(tags)
 
-    db.commit()
-    db.refresh(item)
-    return item
+    await _commit_item(db)
+    if settings.AUTO_TAG_ON_WRITE:
+        await AutoTaggingService.run(db, incremental=True, item_ids=[item.id])
+    MenuCache.bump()
+    return await _load_item(db, item.id)
 
 
 @router.delete("/{item_id}")
 async def delete_item(
     item_id: int,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Delete a menu item.
     Admin only.
     """
-    item = db.query(Item).filter(Item.id == item_id).first()
+    # Tags are loaded so the session can remove the item's tag links
+    item = await db.scalar(select(Item).options(selectinload(Item.tags)).where(Item.id == item_id))
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    db.delete(item)
-    db.commit()
+    await db.delete(item)
+    await db.commit()
+    MenuCache.bump()
     return {"message": "Item deleted successfully"}
 
 
+@router.post("/batch")
+async def batch_items(
+    batch: ItemBatchRequest,
+    current_user: str = Depends(get_current_user),  # noqa: ARG001
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Create, update and delete many items in one transaction.
+    Admin only.
+
+    Send either `operations`, a list of {"op": "create", "item": {...}},
+    {"op": "update", "id": ..., "patch": {...}} and {"op": "delete", "id": ...},
+    or a `filter` with a `patch` to apply to every matching item (e.g.
+    {"is_published": false}) or `delete: true`.
+
+    Changes are applied with a few set-based statements and committed
+    together: if any fails (e.g. a duplicate name within a category) nothing
+    is changed. Returns a result per operation, or per matched item, and the
+    count of each status.
+    """
+    try:
+        if batch.operations is not None:
+            results = await ItemBatchService.apply_operations(db, batch.operations)
+        else:
+            results = await ItemBatchService.apply_filter(
+                db, batch.filter, batch.patch, batch.delete
+            )
+        await db.commit()
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except IntegrityError as e:
+        await db.rollback()
+        sqlstate = getattr(e.orig, "sqlstate", None)
+        if sqlstate == "23505":
+            raise HTTPException(status_code=409, detail=DUPLICATE_ITEM_DETAIL) from e
+        if sqlstate == "23503":
+            detail = "Category not found"
+        else:
+            detail = "Batch violates a constraint on items"
+        raise HTTPException(status_code=400, detail=detail) from e
+
+    if results:
+        MenuCache.bump()
+    summary = Counter(result["status"] for result in results)
+    return {
+        "results": results,
+        "summary": {
+            status: summary[status] for status in ("created", "updated", "deleted", "not_found")
+        },
+    }
+
+
 @router.post("/suggest-tags")
 async def suggest_tags(
     name: str = Query(...),
     description: str | None = None,
     abv: float | None = None,
     origin: str | None = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Suggest tags based on item attributes.
-    Returns matching tags that exist in the database.
+    Returns matching tags that exist in the database, and under similar_tags
+    the tags of the most similar tagged items, with the share of their votes.
+    similar_tags uses the model as last synced, and is empty until it first is.
     """
     # Get suggested tag names
     suggested_names = TagSuggestionService.suggest_tags_from_item(
         name=name, description=description, abv=abv, origin=origin
     )
-
-    # Find existing tags with these names
-    if suggested_names:
-        suggested_tags = db.query(Tag).filter(Tag.name.in_(suggested_names)).all()
-    else:
-        suggested_tags = []
+    # A public endpoint, so it never waits for the similarity model to sync
+    similar = (
+        await SimilarTagSuggester.suggest(
+            db, [{"name": name, "description": description}], wait=False
+        )
+    )[0]
+
+    # Find existing tags with these names, and the similar tags, in one query
+    tags = []
+    if suggested_names or similar:
+        tags = list(
+            await db.scalars(
+                select(Tag).where(
+                    or_(
+                        Tag.name.in_(suggested_names),
+                        Tag.id.in_([tag_id for tag_id, _ in similar]),
+                    )
+                )
+            )
+        )
+    tags_by_id = {tag.id: tag for tag in tags}
 
     return {
         "suggested_tag_names": list(suggested_names),
-        "existing_tags": suggested_tags,
+        "existing_tags": [tag for tag in tags if tag.name in suggested_names],
+        "similar_tags": [
+            {**tag_to_dict(tags_by_id[tag_id]), "score": score}
+            for tag_id, score in similar
+            if tag_id in tags_by_id
+        ],
     }
 
 
-@router.get("/origins/list")
-async def get_origins(db: Session = Depends(get_db)):
+@router.post("/suggest-tags/batch")
+async def suggest_tags_batch(
+    batch: TagSuggestionBatchRequest,
+    current_user: str = Depends(get_current_user),  # noqa: ARG001
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Suggest tags for many items in one request, e.g. to pre-tag a catalogue
+    before importing it.
+    Admin only.
+
+    Returns a result per item, in order, with the same fields as
+    /suggest-tags; suggested names and similar tags are resolved with a
+    single query for the whole batch.
+    """
+    items = [item.model_dump() for item in batch.items]
+    suggestions = TagSuggestionService.suggest_tags_for_items(items)
+    similar = await SimilarTagSuggester.suggest(db, items)
+
+    # Find existing tags for every name and similar tag across the batch
+    suggested_names = set().union(*suggestions)
+    similar_ids = {tag_id for tags in similar for tag_id, _ in tags}
+    tags_by_name, tags_by_id = {}, {}
+    if suggested_names or similar_ids:
+        tags = await db.scalars(
+            select(Tag).where(or_(Tag.name.in_(suggested_names), Tag.id.in_(similar_ids)))
+        )
+        for tag in tags:
+            tags_by_name[tag.name] = tags_by_id[tag.id] = tag_to_dict(tag)
+
+    results = []
+    for names, similar_tags in zip(map(sorted, suggestions), similar, strict=True):
+        results.append(
+            {
+                "suggested_tag_names": names,
+                "existing_tags": [tags_by_name[name] for name in names if name in tags_by_name],
+                "similar_tags": [
+                    {**tags_by_id[tag_id], "score": score}
+                    for tag_id, score in similar_tags
+                    if tag_id in tags_by_id
+                ],
+            }
+        )
+    return FastJSONResponse({"results": results})
+
+
+@router.get("/origins/list", dependencies=[Depends(check_menu_etag)])
+async def get_origins(db: AsyncSession = Depends(get_db)):
     """
-    Get list of unique origins from all published items.
+    Get list of unique origins from all published items, with the number of
+    published items from each origin.
     Public endpoint.
     """
-    # Get all distinct origins from published items
-    origins = (
-        db.query(Item.origin)
-        .filter(Item.is_published.is_(True))
-        .filter(Item.origin.isnot(None))
-        .filter(Item.origin != "")
-        .distinct()
-        .order_by(Item.origin)
-        .all()
-    )
+    # The facet is computed once per menu version; item writes bump the version
+    menu_version = MenuCache.version()
+    cached = MenuCache.get(menu_version, "origins")
+    if cached is not None:
+        return cached
 
-    # Extract just the origin strings from tuples
-    origin_list = [origin[0] for origin in origins if origin[0]]
+    # Count published items per origin
+    origins = (
+        await db.execute(
+            select(Item.origin, func.count())
+            .where(Item.is_published.is_(True))
+            .where(Item.origin.isnot(None))
+            .where(Item.origin != "")
+            .group_by(Item.origin)
+            .order_by(Item.origin)
+        )
+    ).all()
 
-    return {"origins": origin_list}
+    response = {
+        "origins": [origin for origin, _ in origins],
+        "facets": [{"origin": origin, "count": count} for origin, count in origins],
+    }
+    MenuCache.set(menu_version, "origins", response)
+    return response
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+
+from app.api.v1.endpoints.auth import get_current_user
+from app.core.config import settings
+from app.core.database import engine
+from app.core.pool import pool_metrics, pool_status
+
+router = APIRouter()
+
+
+@router.get("/db-pool")
+async def get_db_pool_metrics(
+    current_user: str = Depends(get_current_user),  # noqa: ARG001
+):
+    """
+    Report database connection pool usage.
+    Shows checked-out and idle connections, checkout wait times, overflow
+    connections and timeouts since startup (or the last reset).
+    Admin only.
+    """
+    return {
+        **pool_status(engine.pool),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+
+@router.post("/db-pool/reset")
+async def reset_db_pool_metrics(
+    current_user: str = Depends(get_current_user),  # noqa: ARG001
+):
+    """
+    Reset the connection pool counters, e.g. before a load test.
+    Admin only.
+    """
+    pool_metrics.reset()
+    return {"message": "Pool metrics reset"}
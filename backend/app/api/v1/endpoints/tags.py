@@ -1,32 +1,44 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.api.v1.endpoints.auth import get_current_user
 from app.core.database import get_db
-from app.models import Item, Tag
+from app.core.http_cache import check_menu_etag
+from app.models import Tag
 from app.schemas.item import TagCreate, TagResponse, TagUpdate
+from app.services.auto_tagging import AutoTaggingService
+from app.services.menu_cache import MenuCache
 from app.services.tag_suggestion import TagSuggestionService
 
 router = APIRouter()
 
 
-@router.get("", response_model=list[TagResponse])
-async def get_tags(db: Session = Depends(get_db)):
+@router.get("", response_model=list[TagResponse], dependencies=[Depends(check_menu_etag)])
+async def get_tags(db: AsyncSession = Depends(get_db)):
     """
     Get all tags.
     Public endpoint.
     """
-    tags = db.query(Tag).order_by(Tag.name).all()
-    return tags
+    menu_version = MenuCache.version()
+    cached = MenuCache.get(menu_version, "tags")
+    if cached is not None:
+        return cached
+
+    tags = list(await db.scalars(select(Tag).order_by(Tag.name)))
+    response = [TagResponse.model_validate(tag) for tag in tags]
+    MenuCache.set(menu_version, "tags", response)
+    return response
 
 
 @router.get("/{tag_id}", response_model=TagResponse)
-async def get_tag(tag_id: int, db: Session = Depends(get_db)):
+async def get_tag(tag_id: int, db: AsyncSession = Depends(get_db)):
     """
     Get a single tag by ID.
     Public endpoint.
     """
-    tag = db.query(Tag).filter(Tag.id == tag_id).first()
+    tag = await db.scalar(select(Tag).where(Tag.id == tag_id))
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
     return tag
@@ -36,14 +48,14 @@ async def get_tag(tag_id: int, db: Session = Depends(get_db)):
 async def create_tag(
     tag_data: TagCreate,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Create a new tag.
     Admin only.
     """
     # Check if slug already exists
-    existing = db.query(Tag).filter(Tag.slug == tag_data.slug).first()
+    existing = await db.scalar(select(Tag).where(Tag.slug == tag_data.slug))
     if existing:
         raise HTTPException(status_code=400, detail="Tag slug already exists")
 
@@ -54,8 +66,9 @@ async def create_tag(
 
     tag = Tag(**tag_dict)
     db.add(tag)
-    db.commit()
-    db.refresh(tag)
+    await db.commit()
+    MenuCache.bump()
+    await db.refresh(tag)
     return tag
 
 
@@ -64,19 +77,19 @@ async def update_tag(
     tag_id: int,
     tag_data: TagUpdate,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Update an existing tag.
     Admin only.
     """
-    tag = db.query(Tag).filter(Tag.id == tag_id).first()
+    tag = await db.scalar(select(Tag).where(Tag.id == tag_id))
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
 
     # Check slug uniqueness if being updated
     if tag_data.slug and tag_data.slug != tag.slug:
-        existing = db.query(Tag).filter(Tag.slug == tag_data.slug).first()
+        existing = await db.scalar(select(Tag).where(Tag.slug == tag_data.slug))
         if existing:
             raise HTTPException(status_code=400, detail="Tag slug already exists")
 
@@ -85,8 +98,9 @@ async def update_tag(
     for field, value in update_data.items():
         setattr(tag, field, value)
 
-    db.commit()
-    db.refresh(tag)
+    await db.commit()
+    MenuCache.bump()
+    await db.refresh(tag)
     return tag
 
 
@@ -94,25 +108,28 @@ async def update_tag(
 async def delete_tag(
     tag_id: int,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Delete a tag.
     Admin only.
     """
-    tag = db.query(Tag).filter(Tag.id == tag_id).first()
+    # Items are loaded so the session can remove the tag's item links
+    tag = await db.scalar(select(Tag).options(selectinload(Tag.items)).where(Tag.id == tag_id))
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
 
-    db.delete(tag)
-    db.commit()
+    await db.delete(tag)
+    await db.commit()
+    MenuCache.bump()
     return {"message": "Tag deleted successfully"}
 
 
 @router.post("/auto-generate")
 async def auto_generate_tags(
+    incremental: bool = False,
     current_user: str = Depends(get_current_user),  # noqa: ARG001
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Auto-generate tags from all items in the database.
@@ -120,91 +137,21 @@ async def auto_generate_tags(
     Creates tags that don't already exist and assigns them to the items
     they were found on.
     Admin only.
-    """
-    # Get all items
-    items = db.query(Item).all()
-
-    # Collect suggested tags per item
-    item_suggestions = {}  # {item_id: [tag_names]}
-    all_suggested_tags = set()
-
-    for item in items:
-        suggested = TagSuggestionService.suggest_tags_from_item(
-            name=item.name,
-            description=item.description,
-            abv=item.abv,
-            origin=item.origin,
-        )
-        item_suggestions[item.id] = suggested
-        all_suggested_tags.update(suggested)
-
-    # Get existing tags
-    existing_tags_dict = {tag.name.lower(): tag for tag in db.query(Tag).all()}
-
-    # Color mapping for different tag types
-    color_map = {
-        "hoppy": "#10B981",
-        "malty": "#F59E0B",
-        "fruity": "#EC4899",
-        "citrus": "#FBBF24",
-        "sweet": "#F472B6",
-        "dry": "#8B5CF6",
-        "crisp": "#3B82F6",
-        "light": "#60A5FA",
-        "rich": "#7C3AED",
-        "tart": "#DC2626",
-        "oaky": "#92400E",
-    }
-
-    # Create new tags
-    created_tags = []
-    for tag_name in all_suggested_tags:
-        if tag_name.lower() not in existing_tags_dict:
-            # Generate slug
-            slug = tag_name.lower().replace(" ", "-")
-
-            # Get description
-            description = TagSuggestionService.get_tag_description(tag_name)
-
-            # Assign color
-            color = color_map.get(tag_name.lower(), "#3B82F6")
 
-            tag = Tag(name=tag_name.title(), slug=slug, description=description, color=color)
-            db.add(tag)
-            db.flush()  # Flush to get the tag ID
-            existing_tags_dict[tag_name.lower()] = tag
-            created_tags.append(tag_name.title())
+    Items are processed in chunks with short transactions; the response
+    includes the time spent scanning items, creating tags and linking them.
 
-    # Now assign tags to items
-    items_updated = 0
-    for item in items:
-        if item.id in item_suggestions:
-            suggested_tag_names = item_suggestions[item.id]
-
-            # Get current tag IDs for this item
-            current_tag_ids = {tag.id for tag in item.tags}
-
-            # Find tags to add
-            tags_to_add = []
-            for tag_name in suggested_tag_names:
-                tag = existing_tags_dict.get(tag_name.lower())
-                if tag and tag.id not in current_tag_ids:
-                    tags_to_add.append(tag)
-
-            # Add new tags to item
-            if tags_to_add:
-                item.tags.extend(tags_to_add)
-                items_updated += 1
-
-    db.commit()
-
-    msg = f"Successfully created {len(created_tags)} new tags"
-    msg += f" and updated {items_updated} items"
+    With incremental=true only items whose name, description, ABV or origin
+    changed since they were last auto-tagged (or new items) are analysed.
+    """
+    result = await AutoTaggingService.run(db, incremental=incremental)
+    if result["created_tags"] or result["links_added"]:
+        MenuCache.bump()
 
+    created = len(result["created_tags"])
     return {
-        "message": msg,
-        "created_tags": created_tags,
-        "items_updated": items_updated,
-        "total_suggested": len(all_suggested_tags),
-        "already_existed": len(all_suggested_tags) - len(created_tags),
+        "message": f"Successfully created {created} new tags"
+        f" and updated {result['items_updated']} items",
+        **result,
+        "already_existed": result["total_suggested"] - created,
     }
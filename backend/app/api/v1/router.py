@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, categories, data, items, tags
+from app.api.v1.endpoints import auth, categories, data, items, metrics, tags
 
 api_router = APIRouter()
 
@@ -14,3 +14,4 @@ api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 
 # Admin endpoints
 api_router.include_router(data.router, prefix="/data", tags=["data"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
@@ -4,6 +4,11 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "postgresql://drinklink:drinklink_dev_password@db:5432/drinklink"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced, -1 disables
+    DB_POOL_PRE_PING: bool = True
 
     # Security
     SECRET_KEY: str = "dev-secret-key-change-in-production"
@@ -16,6 +21,20 @@ class Settings(BaseSettings):
     # Environment
     ENVIRONMENT: str = "development"
 
+    # Public menu response cache (per process)
+    MENU_CACHE_MAX_ENTRIES: int = 512
+    MENU_CACHE_TTL_SECONDS: int = 300
+
+    # How long the nginx proxy may reuse public menu responses; browsers always revalidate
+    MENU_HTTP_MAX_AGE_SECONDS: int = 30
+
+    # Days deletion tombstones are kept for delta exports; a since older than
+    # this needs a full export instead
+    DELETED_RECORDS_RETENTION_DAYS: int = 30
+
+    # Auto-tag items incrementally whenever one is created or updated
+    AUTO_TAG_ON_WRITE: bool = False
+
     # Admin
     ADMIN_USERNAME: str = "admin"
     ADMIN_PASSWORD: str = "change-me-in-production"
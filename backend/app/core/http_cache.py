@@ -0,0 +1,74 @@
+import hashlib
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.services.menu_cache import MenuCache
+
+
+def etag_matches(if_none_match: str | None, etag: str, match_any: bool = True) -> bool:
+    """
+    Check an If-None-Match header value against an ETag.
+    Handles comma-separated lists and weak validators, and "*" unless
+    match_any is false because the resource may not exist.
+    """
+    if not if_none_match:
+        return False
+
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    if match_any and "*" in candidates:
+        return True
+    return any(value.removeprefix("W/") == etag for value in candidates)
+
+
+# Query values FastAPI reads as false
+FALSE_VALUES = {"0", "off", "f", "false", "n", "no"}
+
+
+def is_private_request(request: Request) -> bool:
+    """
+    Check whether a request is for admin data: authenticated, or asking for
+    unpublished items too.
+    """
+    published_only = request.query_params.get("published_only", "true")
+    return "authorization" in request.headers or published_only.lower() in FALSE_VALUES
+
+
+async def check_menu_etag(
+    request: Request, response: Response, db: AsyncSession = Depends(get_db)
+) -> None:
+    """
+    Dependency for public menu endpoints that answers conditional GETs.
+
+    The ETag combines the menu fingerprint with the request path and query, so
+    it changes whenever the menu does. Raises a 304 Not Modified when the client
+    already holds the current representation, otherwise sets ETag and
+    Cache-Control on the response.
+
+    Browsers must revalidate every time (a cheap 304 while the menu is
+    unchanged), so admin edits show up at once. Only the nginx proxy may reuse
+    public responses for MENU_HTTP_MAX_AGE_SECONDS, via X-Accel-Expires, which
+    nginx doesn't pass on. Admin requests are never stored.
+
+    "*" only matches collection endpoints, which always exist. This runs
+    before the endpoint, so for a path like /items/{item_id} it can't know
+    the item exists and a 404 must not turn into a 304.
+    """
+    fingerprint = await MenuCache.fingerprint(db)
+    resource = f"{request.url.path}?{sorted(request.query_params.multi_items())}"
+    etag = '"' + hashlib.sha256(f"{fingerprint}:{resource}".encode()).hexdigest()[:32] + '"'
+
+    if is_private_request(request):
+        headers = {"ETag": etag, "Cache-Control": "private, no-store"}
+    else:
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "private, no-cache",
+            "X-Accel-Expires": str(settings.MENU_HTTP_MAX_AGE_SECONDS),
+        }
+    if etag_matches(request.headers.get("if-none-match"), etag, match_any=not request.path_params):
+        raise HTTPException(status_code=304, headers=headers)
+
+    response.headers.update(headers)
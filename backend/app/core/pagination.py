@@ -0,0 +1,29 @@
+import base64
+import json
+from typing import Any
+
+
+def encode_cursor(data: dict[str, Any]) -> str:
+    """
+    Encode keyset pagination state into an opaque, URL-safe cursor string.
+    """
+    raw = json.dumps(data, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(data, dict):
+        raise ValueError("Invalid cursor")
+    return data
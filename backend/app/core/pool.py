@@ -0,0 +1,100 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    """
+    Counters describing how hard the application works its connection pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.overflow_checkouts = 0
+            self.timeouts = 0
+            self.total_wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+
+    def record_checkout(self, wait_seconds: float, overflowed: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            if overflowed:
+                self.overflow_checkouts += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.total_wait_seconds, 6),
+                "wait_seconds_avg": (
+                    round(self.total_wait_seconds / self.checkouts, 6) if self.checkouts else 0.0
+                ),
+                "wait_seconds_max": round(self.max_wait_seconds, 6),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that records checkout wait times, overflow connections
+    and checkout timeouts in pool_metrics.
+
+    The wait is the time spent getting a connection from the pool, not opening
+    one: the setup time of a newly created connection is left out.
+    """
+
+    def _create_connection(self):
+        # Only _do_get calls this, once it has claimed a slot and before the
+        # connect awaits, so the overflow count is this checkout's alone
+        overflowed = self._overflow > 0
+        started = time.perf_counter()
+        record = super()._create_connection()
+        record._checkout_overflowed = overflowed
+        record._connect_seconds = time.perf_counter() - started
+        return record
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        waited = time.perf_counter() - started
+
+        # Set on connections opened by this checkout, beyond pool_size or not
+        created = vars(record)
+        waited -= created.pop("_connect_seconds", 0.0)
+        overflowed = created.pop("_checkout_overflowed", False)
+        pool_metrics.record_checkout(max(waited, 0.0), overflowed)
+        return record
+
+
+def pool_status(pool: AsyncAdaptedQueuePool) -> dict:
+    """
+    Report the current state of a queue pool together with pool_metrics.
+    """
+    return {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        **pool_metrics.snapshot(),
+    }
@@ -0,0 +1,27 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    Serialize plain Python data with orjson.
+    UTC datetimes are written with a "Z" suffix, matching Pydantic's output.
+    """
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    Endpoints return it directly with plain dicts (or already-rendered bytes)
+    to skip response_model validation on hot paths; the response_model still
+    documents the schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dump_json(content)
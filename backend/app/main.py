@@ -1,8 +1,9 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.router import api_router
 from app.core.config import settings
+from app.core.database import count_queries
 
 app = FastAPI(
     title="DrinkLink API",
@@ -19,6 +20,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+# Expose per-request SQL statement counts while developing, to spot N+1 loading
+@app.middleware("http")
+async def add_query_count_header(request: Request, call_next):
+    if settings.ENVIRONMENT != "development":
+        return await call_next(request)
+
+    with count_queries() as counter:
+        response = await call_next(request)
+    response.headers["X-Query-Count"] = str(counter.count)
+    return response
+
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
@@ -1,4 +1,5 @@
 # Models package
+from app.models.deleted_record import DeletedRecord
 from app.models.item import Category, Item, Tag, item_tags
 
-__all__ = ["Item", "Category", "Tag", "item_tags"]
+__all__ = ["Item", "Category", "Tag", "item_tags", "DeletedRecord"]
@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class DeletedRecord(Base):
+    """
+    Tombstone for a deleted category, tag or item, written by database
+    triggers so delta exports can report deletions.
+    """
+
+    __tablename__ = "deleted_records"
+
+    id = Column(BigInteger, primary_key=True)
+    table_name = Column(String(20), nullable=False)  # "categories", "tags" or "items"
+    record_id = Column(Integer, nullable=False)
+    deleted_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+    )
@@ -4,12 +4,14 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
     Text,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
 from app.core.database import Base
@@ -20,6 +22,8 @@ item_tags = Table(
     Base.metadata,
     Column("item_id", Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True),
     Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key serves lookups by item; this serves tag filters
+    Index("ix_item_tags_tag_id_item_id", "tag_id", "item_id"),
 )
 
 
@@ -38,6 +42,9 @@ class Category(Base):
     # Relationships
     items = relationship("Item", back_populates="category", cascade="all, delete-orphan")
 
+    # Serves delta exports of rows changed since a point in time
+    __table_args__ = (Index("ix_categories_modified_at", func.coalesce(updated_at, created_at)),)
+
 
 class Tag(Base):
     __tablename__ = "tags"
@@ -53,6 +60,9 @@ class Tag(Base):
     # Relationships
     items = relationship("Item", secondary=item_tags, back_populates="tags")
 
+    # Serves delta exports of rows changed since a point in time
+    __table_args__ = (Index("ix_tags_modified_at", func.coalesce(updated_at, created_at)),)
+
 
 class Item(Base):
     __tablename__ = "items"
@@ -76,10 +86,45 @@ class Item(Base):
     sort_order = Column(Integer, default=0)
     image_url = Column(String(500))
 
+    # Fingerprint of the fields last auto-tagged from, see AutoTaggingService
+    autotag_fingerprint = Column(String(32))
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Weighted full-text document (name, producer, tags, category, description),
+    # maintained by database triggers - see the add_item_search_vector migration
+    search_vector = deferred(Column(TSVECTOR))
+
     # Relationships
     category = relationship("Category", back_populates="items")
     tags = relationship("Tag", secondary=item_tags, back_populates="items")
+
+    __table_args__ = (
+        # Composite (sort column, id) indexes serving keyset pagination seeks
+        Index("ix_items_name_id", "name", "id"),
+        Index("ix_items_price_id", "price", "id"),
+        Index("ix_items_abv_id", "abv", "id"),
+        Index("ix_items_created_at_id", "created_at", "id"),
+        # Descending listings keep NULLs last, so nullable columns need their own
+        Index("ix_items_abv_desc_id", abv.desc().nulls_last(), id.desc()),
+        Index("ix_items_created_at_desc_id", created_at.desc().nulls_last(), id.desc()),
+        Index("ix_items_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_items_origin_trgm",
+            "origin",
+            postgresql_using="gin",
+            postgresql_ops={"origin": "gin_trgm_ops"},
+        ),
+        # Serves delta exports of rows changed since a point in time
+        Index("ix_items_modified_at", func.coalesce(updated_at, created_at)),
+        # Natural key matched by imports; NULL categories compare equal
+        Index(
+            "uq_items_name_category_id",
+            "name",
+            "category_id",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
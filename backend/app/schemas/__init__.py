@@ -3,16 +3,24 @@ from app.schemas.auth import LoginRequest, Token, TokenData
 from app.schemas.item import (
     CategoryBase,
     CategoryCreate,
+    CategoryImport,
     CategoryResponse,
     CategoryUpdate,
+    DeletedImport,
     ItemBase,
+    ItemBatchFilter,
+    ItemBatchRequest,
     ItemCreate,
+    ItemImport,
     ItemListResponse,
     ItemResponse,
     ItemUpdate,
     TagBase,
     TagCreate,
+    TagImport,
     TagResponse,
+    TagSuggestionBatchRequest,
+    TagSuggestionItem,
     TagUpdate,
 )
 
@@ -30,6 +38,14 @@ __all__ = [
     "ItemUpdate",
     "ItemResponse",
     "ItemListResponse",
+    "ItemBatchFilter",
+    "ItemBatchRequest",
+    "TagSuggestionItem",
+    "TagSuggestionBatchRequest",
+    "CategoryImport",
+    "TagImport",
+    "ItemImport",
+    "DeletedImport",
     "Token",
     "TokenData",
     "LoginRequest",
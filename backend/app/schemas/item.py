@@ -1,6 +1,7 @@
 from datetime import datetime
+from typing import Annotated, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 # Category Schemas
@@ -109,7 +110,127 @@ class ItemResponse(ItemBase):
 # List response with metadata
 class ItemListResponse(BaseModel):
     items: list[ItemResponse]
-    total: int
+    total: int | None = None
     page: int
     page_size: int
-    pages: int
+    pages: int | None = None
+    next_cursor: str | None = None
+
+
+# Batch Schemas
+class ItemBatchCreate(BaseModel):
+    op: Literal["create"]
+    item: ItemCreate
+
+
+class ItemBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    patch: ItemUpdate
+
+
+class ItemBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+ItemBatchOperation = Annotated[
+    ItemBatchCreate | ItemBatchUpdate | ItemBatchDelete, Field(discriminator="op")
+]
+
+
+class ItemBatchFilter(BaseModel):
+    """
+    Items matched by a batch: those meeting every given criterion. An explicit
+    null category_id matches uncategorized items.
+    """
+
+    ids: list[int] | None = None
+    category_id: int | None = None
+    tag_ids: list[int] | None = None  # Items carrying any of these tags
+    producer: str | None = None
+    is_published: bool | None = None
+
+    @model_validator(mode="after")
+    def require_criterion(self) -> "ItemBatchFilter":
+        if not self.model_fields_set:
+            raise ValueError("filter needs at least one criterion")
+        return self
+
+
+class ItemBatchRequest(BaseModel):
+    """
+    Either a list of operations, or a filter with a patch to apply to (or
+    delete=true to delete) every item it matches.
+    """
+
+    operations: list[ItemBatchOperation] | None = Field(None, max_length=5000)
+    filter: ItemBatchFilter | None = None
+    patch: ItemUpdate | None = None
+    delete: bool = False
+
+    @model_validator(mode="after")
+    def check_form(self) -> "ItemBatchRequest":
+        if (self.operations is None) == (self.filter is None):
+            raise ValueError("give either operations or a filter")
+        if self.filter is not None and (self.patch is None) == (not self.delete):
+            raise ValueError("a filter needs either a patch or delete=true")
+        if self.operations is not None and (self.patch is not None or self.delete):
+            raise ValueError("patch and delete go with a filter, not operations")
+        return self
+
+
+# Tag Suggestion Schemas
+class TagSuggestionItem(BaseModel):
+    name: str
+    description: str | None = None
+    abv: float | None = None
+    origin: str | None = None
+
+
+class TagSuggestionBatchRequest(BaseModel):
+    items: list[TagSuggestionItem] = Field(..., max_length=5000)
+
+
+# Import Schemas
+# Rows of data imports, validated strictly so that rows which pass are written as-is
+class CategoryImport(CategoryCreate):
+    model_config = ConfigDict(strict=True)
+
+    id: int
+
+
+class TagImport(TagCreate):
+    model_config = ConfigDict(strict=True)
+
+    id: int
+
+
+class ItemImport(ItemCreate):
+    """
+    Item row of an import. Rows with an id are matched on it; rows without
+    one may give their category and tags by name instead, and default their
+    price to 0.
+    """
+
+    model_config = ConfigDict(strict=True)
+
+    id: int | None = None
+    price: float = Field(0.0, ge=0)
+    # None leaves an existing item's tags alone
+    tag_ids: list[int] | None = None
+    category: str | None = None
+    tags: list[str] | None = None
+
+    @model_validator(mode="after")
+    def require_price_with_id(self) -> "ItemImport":
+        if self.id and "price" not in self.model_fields_set:
+            raise ValueError("price is required for items with an id")
+        return self
+
+
+class DeletedImport(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    table: Literal["categories", "tags", "items"]
+    id: int
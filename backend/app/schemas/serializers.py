@@ -0,0 +1,54 @@
+"""
+Plain-dict serializers for hot response paths.
+Each function produces the same fields, in the same order, as the matching
+*Response schema.
+"""
+
+from app.models import Category, Item, Tag
+
+
+def category_to_dict(category: Category) -> dict:
+    return {
+        "name": category.name,
+        "slug": category.slug,
+        "description": category.description,
+        "icon": category.icon,
+        "sort_order": category.sort_order,
+        "id": category.id,
+        "created_at": category.created_at,
+        "updated_at": category.updated_at,
+    }
+
+
+def tag_to_dict(tag: Tag) -> dict:
+    return {
+        "name": tag.name,
+        "slug": tag.slug,
+        "description": tag.description,
+        "color": tag.color,
+        "id": tag.id,
+        "created_at": tag.created_at,
+        "updated_at": tag.updated_at,
+    }
+
+
+def item_to_dict(item: Item) -> dict:
+    """Serialize an item with its category and tags already loaded."""
+    return {
+        "name": item.name,
+        "description": item.description,
+        "category_id": item.category_id,
+        "price": item.price,
+        "abv": item.abv,
+        "volume": item.volume,
+        "origin": item.origin,
+        "producer": item.producer,
+        "is_published": item.is_published,
+        "sort_order": item.sort_order,
+        "image_url": item.image_url,
+        "id": item.id,
+        "created_at": item.created_at,
+        "updated_at": item.updated_at,
+        "category": category_to_dict(item.category) if item.category else None,
+        "tags": [tag_to_dict(tag) for tag in item.tags],
+    }
@@ -1,4 +1,20 @@
 # Services package
+from app.services.auto_tagging import AutoTaggingService
+from app.services.data_import import DataImportService
+from app.services.deleted_records import DeletedRecordService
+from app.services.import_jobs import ImportJobs
+from app.services.item_batch import ItemBatchService
+from app.services.menu_cache import MenuCache
+from app.services.tag_similarity import SimilarTagSuggester
 from app.services.tag_suggestion import TagSuggestionService
 
-__all__ = ["TagSuggestionService"]
+__all__ = [
+    "AutoTaggingService",
+    "DataImportService",
+    "DeletedRecordService",
+    "ImportJobs",
+    "ItemBatchService",
+    "MenuCache",
+    "SimilarTagSuggester",
+    "TagSuggestionService",
+]
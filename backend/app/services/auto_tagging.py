@@ -0,0 +1,246 @@
+import hashlib
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+import orjson
+from sqlalchemy import Row, Text, bindparam, cast, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Item, Tag, item_tags
+from app.services.tag_suggestion import TagSuggestionService
+
+
+class AutoTaggingService:
+    """
+    Tags every item with the tags TagSuggestionService suggests for it,
+    creating the suggested tags that don't exist yet.
+
+    Items are read in id order CHUNK_SIZE at a time, missing tags are created
+    with one INSERT, and new item links are worked out against the items'
+    existing links, then inserted a chunk at a time. Each step commits on its
+    own, so no transaction spans the whole catalogue.
+
+    Each item records a fingerprint of the fields it was tagged from, so
+    incremental runs only analyse items that are new or changed since.
+    """
+
+    # Items read, and item links inserted, per statement
+    CHUNK_SIZE = 2000
+
+    # Colors for new tags by type
+    TAG_COLORS = {
+        "hoppy": "#10B981",
+        "malty": "#F59E0B",
+        "fruity": "#EC4899",
+        "citrus": "#FBBF24",
+        "sweet": "#F472B6",
+        "dry": "#8B5CF6",
+        "crisp": "#3B82F6",
+        "light": "#60A5FA",
+        "rich": "#7C3AED",
+        "tart": "#DC2626",
+        "oaky": "#92400E",
+    }
+    DEFAULT_COLOR = "#3B82F6"
+
+    @classmethod
+    async def run(
+        cls, db: AsyncSession, incremental: bool = False, item_ids: list[int] | None = None
+    ) -> dict[str, Any]:
+        """
+        Auto-tag the catalogue, recording the fingerprint of what each item
+        was tagged from.
+
+        Args:
+            incremental: Only tag items whose name, description, abv or origin
+                changed since they were last auto-tagged, or that never were
+            item_ids: Only consider these items
+
+        Returns:
+            Dictionary with the names of created tags, the number of names
+            suggested, items updated, scanned and links added, and seconds
+            spent per step
+        """
+        started = time.perf_counter()
+
+        # Suggest tags for the items, and load the links they already have
+        suggestions: dict[int, set[str]] = {}
+        fingerprints: dict[int, str] = {}
+        current: set[tuple[int, int]] = set()
+        async for items in cls._item_chunks(db, incremental, item_ids):
+            for item_id, name, description, abv, origin, fingerprint in items:
+                suggestions[item_id] = TagSuggestionService.suggest_tags_from_item(
+                    name=name, description=description, abv=abv, origin=origin
+                )
+                fingerprints[item_id] = fingerprint
+            current.update(
+                (
+                    await db.execute(
+                        select(item_tags.c.item_id, item_tags.c.tag_id).where(
+                            item_tags.c.item_id.in_([item.id for item in items])
+                        )
+                    )
+                ).tuples()
+            )
+        await db.commit()
+        scanned = time.perf_counter()
+
+        all_suggested = set().union(*suggestions.values())
+        tag_ids, created_tags = await cls._create_missing_tags(db, all_suggested)
+        await db.commit()
+        tags_created = time.perf_counter()
+
+        # Add the links items don't have yet
+        missing = [
+            (item_id, tag_id)
+            for item_id, names in suggestions.items()
+            for tag_id in sorted({tag_ids.get(name.lower()) for name in names} - {None})
+            if (item_id, tag_id) not in current
+        ]
+        linked_items: list[int] = []
+        for start in range(0, len(missing), cls.CHUNK_SIZE):
+            # One multi-row INSERT per chunk, so the item_tags statement
+            # trigger refreshes search vectors once per chunk rather than per
+            # link; links added since they were loaded are left as they are
+            # and not counted, as only inserted rows are returned
+            result = await db.execute(
+                pg_insert(item_tags)
+                .values(
+                    [
+                        {"item_id": item_id, "tag_id": tag_id}
+                        for item_id, tag_id in missing[start : start + cls.CHUNK_SIZE]
+                    ]
+                )
+                .on_conflict_do_nothing()
+                .returning(item_tags.c.item_id)
+            )
+            linked_items.extend(result.scalars())
+            await db.commit()
+
+        # Record what the items were tagged from. Fingerprints were read with
+        # the fields, so an item changed meanwhile is picked up next time;
+        # updated_at is kept as this isn't a change to the item
+        fingerprint_rows = [
+            {"item_id": item_id, "fingerprint": fingerprint}
+            for item_id, fingerprint in fingerprints.items()
+        ]
+        for start in range(0, len(fingerprint_rows), cls.CHUNK_SIZE):
+            await db.execute(
+                update(Item.__table__)
+                .where(Item.id == bindparam("item_id"))
+                .values(autotag_fingerprint=bindparam("fingerprint"), updated_at=Item.updated_at),
+                fingerprint_rows[start : start + cls.CHUNK_SIZE],
+            )
+            await db.commit()
+        finished = time.perf_counter()
+
+        return {
+            "incremental": incremental,
+            "created_tags": created_tags,
+            "total_suggested": len(all_suggested),
+            "items_updated": len(set(linked_items)),
+            "items_scanned": len(suggestions),
+            "links_added": len(linked_items),
+            "timing": {
+                "scan_seconds": round(scanned - started, 3),
+                "create_tags_seconds": round(tags_created - scanned, 3),
+                "link_seconds": round(finished - tags_created, 3),
+                "total_seconds": round(finished - started, 3),
+            },
+        }
+
+    @classmethod
+    def _fingerprint(cls):
+        """
+        SQL expression fingerprinting what an item's tags are suggested from:
+        its name, description, abv and origin, and the keyword table.
+        Editing TAG_KEYWORDS changes every fingerprint.
+        """
+        keywords = hashlib.md5(orjson.dumps(TagSuggestionService.TAG_KEYWORDS)).hexdigest()
+        return func.md5(
+            func.concat_ws(
+                "\x1f",
+                keywords,
+                func.coalesce(Item.name, ""),
+                func.coalesce(Item.description, ""),
+                func.coalesce(cast(Item.abv, Text), ""),
+                func.coalesce(Item.origin, ""),
+            )
+        )
+
+    @classmethod
+    async def _item_chunks(
+        cls, db: AsyncSession, incremental: bool, item_ids: list[int] | None
+    ) -> AsyncIterator[list[Row]]:
+        """
+        Yield the fields tags are suggested from, with their fingerprint,
+        CHUNK_SIZE items at a time by id.
+        """
+        fingerprint = cls._fingerprint()
+        query = select(Item.id, Item.name, Item.description, Item.abv, Item.origin, fingerprint)
+        if incremental:
+            query = query.where(Item.autotag_fingerprint.is_distinct_from(fingerprint))
+        if item_ids is not None:
+            query = query.where(Item.id.in_(item_ids))
+
+        last_id = 0
+        while True:
+            items = (
+                await db.execute(
+                    query.where(Item.id > last_id).order_by(Item.id).limit(cls.CHUNK_SIZE)
+                )
+            ).all()
+            if not items:
+                return
+            yield items
+            last_id = items[-1].id
+
+    @classmethod
+    async def _create_missing_tags(
+        cls, db: AsyncSession, names: set[str]
+    ) -> tuple[dict[str, int], list[str]]:
+        """
+        Create tags for the suggested names no tag has yet (case-insensitively)
+        in one INSERT. A name whose slug is already taken maps to the tag
+        holding the slug instead.
+
+        Returns:
+            Tuple of (lowercased name -> tag id for every name, names of the
+            tags created)
+        """
+        tag_ids = {
+            name.lower(): tag_id
+            for tag_id, name in (await db.execute(select(Tag.id, Tag.name))).tuples()
+        }
+        new_tags = [
+            {
+                "name": name.title(),
+                "slug": name.lower().replace(" ", "-"),
+                "description": TagSuggestionService.get_tag_description(name),
+                "color": cls.TAG_COLORS.get(name.lower(), cls.DEFAULT_COLOR),
+            }
+            for name in sorted(names)
+            if name.lower() not in tag_ids
+        ]
+        if not new_tags:
+            return tag_ids, []
+
+        created = (
+            await db.execute(
+                pg_insert(Tag).values(new_tags).on_conflict_do_nothing().returning(Tag.id, Tag.name)
+            )
+        ).tuples()
+        created_tags = []
+        for tag_id, name in created:
+            tag_ids[name.lower()] = tag_id
+            created_tags.append(name)
+
+        taken = {tag["slug"]: tag["name"] for tag in new_tags if tag["name"] not in created_tags}
+        if taken:
+            for tag_id, slug in (
+                await db.execute(select(Tag.id, Tag.slug).where(Tag.slug.in_(taken)))
+            ).tuples():
+                tag_ids[taken[slug].lower()] = tag_id
+        return tag_ids, created_tags
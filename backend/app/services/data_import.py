@@ -0,0 +1,903 @@
+import hashlib
+from collections.abc import AsyncIterable, AsyncIterator, Collection, Iterable, Mapping
+from datetime import datetime
+from typing import Any, NamedTuple
+
+import orjson
+from sqlalchemy import (
+    Row,
+    and_,
+    delete,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Category, Item, Tag, item_tags
+from app.services.deleted_records import DeletedRecordService
+
+# Item fields copied from import rows, with their defaults
+ITEM_FIELDS: dict[str, Any] = {
+    "description": None,
+    "abv": None,
+    "volume": None,
+    "origin": None,
+    "producer": None,
+    "is_published": True,
+    "sort_order": 0,
+    "image_url": None,
+}
+# Category and tag fields copied from import rows besides id, name and slug
+CATEGORY_FIELDS: dict[str, Any] = {"description": None, "icon": None, "sort_order": 0}
+TAG_FIELDS: dict[str, Any] = {"description": None, "color": "#3B82F6"}
+
+# Fields compared to decide whether an imported row changes an existing one
+ITEM_HASH_FIELDS = ("name", "category_id", "price", *ITEM_FIELDS)
+
+
+def content_hash(
+    values: Mapping[str, Any], fields: Iterable[str], tag_ids: Iterable[int] | None = None
+) -> bytes:
+    """
+    Hash a row's field values, and optionally its tag set, for change detection.
+    Integers hash like the equal float, since payloads may carry 5 for a stored 5.0.
+    """
+    content: list[Any] = []
+    for field in fields:
+        value = values[field]
+        # Bools are ints too, but stay bools
+        if isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        content.append(value)
+    if tag_ids is not None:
+        content.append(sorted(set(tag_ids)))
+    return hashlib.blake2b(orjson.dumps(content), digest_size=16).digest()
+
+
+class RowPlan(NamedTuple):
+    """Category or tag rows sorted by what an import does with them."""
+
+    insert: list[dict[str, Any]]
+    update: list[dict[str, Any]]
+    unchanged: list[dict[str, Any]]
+
+
+class ItemChange(NamedTuple):
+    """An item row of an import and the existing item it matched, if any."""
+
+    # The row's id, or its (name, category_id) natural key if it has none
+    ref: int | tuple[str, int | None]
+    values: dict[str, Any]
+    tag_ids: list[int] | None
+    existing_id: int | None
+    # Index of the row within its batch
+    row: int
+
+
+class ItemPlan(NamedTuple):
+    """
+    Item rows sorted by what an import does with them. Conflicts are rows
+    that would take the name and category of another item; existing_id is
+    that item, or None if it's another row of the batch.
+    """
+
+    insert: list[ItemChange]
+    update: list[ItemChange]
+    unchanged: list[ItemChange]
+    conflicts: list[ItemChange]
+
+
+class ImportConflictError(ValueError):
+    """
+    Raised when import rows would take the name and category of another
+    item. Errors are located like validation errors, e.g. ["items", 12].
+    """
+
+    def __init__(self, errors: list[dict[str, Any]]):
+        super().__init__(
+            f"{len(errors)} item rows have the name and category of another item: "
+            + ", ".join(f"row {error['loc'][1]}" for error in errors[:10])
+        )
+        self.errors = errors
+
+    @classmethod
+    def from_plan(cls, plan: "ItemPlan", first_row: int) -> "ImportConflictError":
+        return cls(
+            [
+                {
+                    "loc": ["items", first_row + change.row],
+                    "msg": (
+                        f"Item {change.existing_id} already has this name and category"
+                        if change.existing_id is not None
+                        else "Another row of the import has this name and category"
+                    ),
+                }
+                for change in plan.conflicts
+            ]
+        )
+
+    def detail(self) -> dict[str, Any]:
+        return {
+            "message": "Import conflicts with existing items; nothing was imported",
+            "errors": self.errors,
+        }
+
+
+class DataImportService:
+    """
+    Set-based import of data exports.
+
+    Tag and category names are resolved once into maps, then items are
+    upserted in batches with INSERT ... ON CONFLICT DO UPDATE, instead of one
+    round trip per row.
+    """
+
+    # Item rows written per batch
+    BATCH_SIZE = 1000
+
+    @classmethod
+    async def run(
+        cls, db: AsyncSession, data: dict[str, Any], clear_existing: bool = False
+    ) -> dict[str, int]:
+        """
+        Import an export payload in one transaction, committed at the end.
+
+        Categories and tags are matched by id, and items with an id too;
+        items without an id are matched by name and category. Matched rows are
+        updated if their content changed and left alone otherwise; the rest
+        are created.
+
+        Returns:
+            Counts of imported categories and tags, and of imported, updated
+            and unchanged items
+        """
+        importer = RecordImport(db, clear_existing)
+        async for _ in importer.run(payload_records(data)):
+            pass
+        return importer.counts()
+
+    @classmethod
+    async def dry_run(
+        cls, db: AsyncSession, data: dict[str, Any], clear_existing: bool = False
+    ) -> dict[str, Any]:
+        """
+        Work out what importing an export payload would do, without writing.
+
+        Returns:
+            The import's changeset report (see Changeset)
+        """
+        importer = RecordImport(db, clear_existing, dry_run=True)
+        async for _ in importer.run(payload_records(data)):
+            pass
+        return importer.changeset.report()
+
+    @classmethod
+    async def clear(cls, db: AsyncSession) -> None:
+        """
+        Delete all items, tags and categories. Tag links go with them.
+        """
+        await db.execute(delete(Item))
+        await db.execute(delete(Tag))
+        await db.execute(delete(Category))
+
+    @classmethod
+    async def apply_deletions(cls, db: AsyncSession, deleted: dict[str, list[int]]) -> None:
+        """
+        Delete the items, tags and categories listed by id in a delta export's
+        "deleted" section.
+        """
+        for model, table in ((Item, "items"), (Tag, "tags"), (Category, "categories")):
+            if deleted.get(table):
+                await db.execute(delete(model).where(model.id.in_(deleted[table])))
+
+    @classmethod
+    async def import_categories(cls, db: AsyncSession, rows: list[dict[str, Any]]) -> RowPlan:
+        """
+        Insert categories whose id does not exist yet and update those whose
+        content changed.
+
+        Returns:
+            The rows inserted, updated and left unchanged
+        """
+        plan = await cls.plan_rows(db, Category, CATEGORY_FIELDS, rows)
+        await cls._write_rows(db, Category, plan)
+        return plan
+
+    @classmethod
+    async def import_tags(cls, db: AsyncSession, rows: list[dict[str, Any]]) -> RowPlan:
+        """
+        Insert tags whose id does not exist yet and update those whose content
+        changed.
+
+        Returns:
+            The rows inserted, updated and left unchanged
+        """
+        plan = await cls.plan_rows(db, Tag, TAG_FIELDS, rows)
+        await cls._write_rows(db, Tag, plan)
+        return plan
+
+    @classmethod
+    async def plan_rows(
+        cls,
+        db: AsyncSession,
+        model: type[Category] | type[Tag],
+        fields: dict[str, Any],
+        rows: list[dict[str, Any]],
+        ignore_ids: Collection[int] = (),
+    ) -> RowPlan:
+        """
+        Match category or tag rows to existing rows by id and compare their
+        content hashes. The first row for each id wins.
+
+        Args:
+            db: Database session
+            model: Category or Tag
+            fields: CATEGORY_FIELDS or TAG_FIELDS
+            rows: Rows from an export payload
+            ignore_ids: Existing ids to treat as absent
+        """
+        planned: dict[int, dict[str, Any]] = {}
+        for row in rows:
+            if row["id"] not in planned:
+                planned[row["id"]] = {
+                    "id": row["id"],
+                    "name": row["name"],
+                    "slug": row["slug"],
+                    **{field: row.get(field, default) for field, default in fields.items()},
+                }
+
+        hash_fields = ("name", "slug", *fields)
+        existing = {
+            row.id: content_hash(row._mapping, hash_fields)
+            for row in await db.execute(
+                select(model.id, *(getattr(model, field) for field in hash_fields)).where(
+                    model.id.in_(planned)
+                )
+            )
+            if row.id not in ignore_ids
+        }
+
+        plan = RowPlan([], [], [])
+        for record_id, values in planned.items():
+            if record_id not in existing:
+                plan.insert.append(values)
+            elif existing[record_id] == content_hash(values, hash_fields):
+                plan.unchanged.append(values)
+            else:
+                plan.update.append(values)
+        return plan
+
+    @classmethod
+    async def category_map(cls, db: AsyncSession) -> dict[str, int]:
+        """
+        Map every category name to its id.
+        """
+        return dict((await db.execute(select(Category.name, Category.id))).all())
+
+    @classmethod
+    async def tag_map(cls, db: AsyncSession) -> dict[str, int]:
+        """
+        Map every tag name to its id.
+        """
+        return dict((await db.execute(select(Tag.name, Tag.id))).all())
+
+    @classmethod
+    async def plan_item_batch(
+        cls,
+        db: AsyncSession,
+        rows: list[dict[str, Any]],
+        category_ids: dict[str, int],
+        tag_ids: dict[str, int],
+        ignore_ids: Collection[int] = (),
+    ) -> ItemPlan:
+        """
+        Match a batch of item rows to existing items and compare content
+        hashes of their fields and tag sets.
+
+        Rows with an id match on the id, rows without one on the
+        (name, category_id) natural key; rows with an id no item has yet
+        match on the natural key too, so another venue's export merges into
+        this menu. A row repeated within the batch, by id or natural key,
+        overrides the earlier one. Rows that don't list tags keep the
+        existing item's tags.
+
+        Rows that would give an item the natural key of a different item are
+        planned as conflicts rather than written.
+
+        Args:
+            db: Database session
+            rows: Item rows from an export payload
+            category_ids: Category name to id map from category_map
+            tag_ids: Tag name to id map from tag_map
+            ignore_ids: Existing item ids to treat as absent
+        """
+        known_tag_ids = set(tag_ids.values())
+
+        planned: dict[int | tuple[str, int | None], dict[str, Any]] = {}
+        links: dict[int | tuple[str, int | None], list[int]] = {}
+        indexes: dict[int | tuple[str, int | None], int] = {}
+
+        for index, row in enumerate(rows):
+            values = {field: row.get(field, default) for field, default in ITEM_FIELDS.items()}
+
+            if row.get("id"):
+                ref = row["id"]
+                values.update(
+                    id=ref,
+                    name=row["name"],
+                    category_id=row.get("category_id"),
+                    price=row["price"],
+                )
+                row_tag_ids = row.get("tag_ids")
+            else:
+                # Resolve category by name if category_id not provided
+                category_id = row.get("category_id")
+                if not category_id and "category" in row:
+                    category_id = category_ids.get(row["category"], category_id)
+
+                ref = (row["name"], category_id)
+                values.update(
+                    name=row["name"],
+                    category_id=category_id,
+                    price=row.get("price", 0.0),
+                )
+
+                # Resolve tags by name if tag_ids not provided
+                row_tag_ids = row.get("tag_ids")
+                if row_tag_ids is None and "tags" in row:
+                    row_tag_ids = [tag_ids[name] for name in row["tags"] if name in tag_ids]
+
+            planned[ref] = values
+            indexes[ref] = index
+            if row_tag_ids is not None:
+                links[ref] = [tag_id for tag_id in row_tag_ids if tag_id in known_tag_ids]
+            else:
+                links.pop(ref, None)
+
+        # Load the matching items with their tag sets in one query
+        conditions = []
+        ids = [ref for ref in planned if isinstance(ref, int)]
+        if ids:
+            conditions.append(Item.id.in_(ids))
+        # Natural keys of every row, to match rows without an id and find
+        # the items rows with one would collide with
+        natural_keys = {(values["name"], values["category_id"]) for values in planned.values()}
+        keys = [key for key in natural_keys if key[1] is not None]
+        if keys:
+            conditions.append(tuple_(Item.name, Item.category_id).in_(keys))
+        # NULL never equals NULL in the tuple comparison above
+        uncategorized = [key[0] for key in natural_keys if key[1] is None]
+        if uncategorized:
+            conditions.append(and_(Item.category_id.is_(None), Item.name.in_(uncategorized)))
+
+        tag_set = (
+            select(func.array_agg(item_tags.c.tag_id))
+            .where(item_tags.c.item_id == Item.id)
+            .scalar_subquery()
+        )
+        existing: dict[int | tuple[str, int | None], Row] = {}
+        for row in await db.execute(
+            select(
+                Item.id,
+                *(getattr(Item, field) for field in ITEM_HASH_FIELDS),
+                tag_set.label("tags"),
+            ).where(or_(*conditions))
+        ):
+            if row.id not in ignore_ids:
+                existing[row.id] = row
+                existing[(row.name, row.category_id)] = row
+
+        plan = ItemPlan([], [], [], [])
+        # The change taking each natural key, and the existing item it matched
+        claimed: dict[tuple[str, int | None], tuple[ItemChange, Row | None]] = {}
+        for ref in sorted(planned, key=indexes.__getitem__):
+            values = planned[ref]
+            key = (values["name"], values["category_id"])
+            current = existing.get(ref)
+            if current is None and isinstance(ref, int) and key in existing:
+                # An id new to this menu, for an item it already has
+                current = existing[key]
+                values = {**values, "id": current.id}
+            change = ItemChange(
+                ref, values, links.get(ref), current.id if current else None, indexes[ref]
+            )
+
+            holder = existing.get(key)
+            if holder is not None and holder.id != change.existing_id:
+                plan.conflicts.append(change._replace(existing_id=holder.id))
+                continue
+            if key in claimed and claimed[key][0].existing_id != change.existing_id:
+                plan.conflicts.append(change._replace(existing_id=None))
+                continue
+            # A later row for the same item, or the same new item, wins
+            claimed[key] = (change, current)
+
+        for change, current in claimed.values():
+            if current is None:
+                plan.insert.append(change)
+                continue
+
+            # Rows that don't list tags leave the tag set alone, so compare fields only
+            compare_tags = change.tag_ids is not None
+            if content_hash(
+                change.values, ITEM_HASH_FIELDS, change.tag_ids if compare_tags else None
+            ) == content_hash(
+                current._mapping, ITEM_HASH_FIELDS, (current.tags or []) if compare_tags else None
+            ):
+                plan.unchanged.append(change)
+            else:
+                plan.update.append(change)
+        return plan
+
+    @classmethod
+    async def import_item_batch(
+        cls,
+        db: AsyncSession,
+        rows: list[dict[str, Any]],
+        category_ids: dict[str, int],
+        tag_ids: dict[str, int],
+        first_row: int = 0,
+    ) -> tuple[int, int, int]:
+        """
+        Create or update a batch of items and replace the tags of items whose
+        row lists tag_ids (or tag names, for rows without an id). Rows whose
+        content hash matches the existing item are not written.
+
+        Rows with an id are upserted on the id (of the item they matched),
+        rows without one on the (name, category_id) natural key.
+
+        Args:
+            db: Database session
+            rows: Item rows from an export payload
+            category_ids: Category name to id map from category_map
+            tag_ids: Tag name to id map from tag_map
+            first_row: Index of the batch's first row among the import's items
+
+        Raises:
+            ImportConflictError: If rows would take the natural key of another
+                item; nothing is written
+
+        Returns:
+            Tuple of (items imported, items updated, items unchanged)
+        """
+        plan = await cls.plan_item_batch(db, rows, category_ids, tag_ids)
+        if plan.conflicts:
+            raise ImportConflictError.from_plan(plan, first_row)
+        changes = plan.insert + plan.update
+
+        by_id = [change for change in changes if isinstance(change.ref, int)]
+        by_key = [change for change in changes if isinstance(change.ref, tuple)]
+        links = {
+            change.values["id"] if isinstance(change.ref, int) else change.ref: change.tag_ids
+            for change in changes
+            if change.tag_ids is not None
+        }
+
+        imported = 0
+        if by_id:
+            upserted = await cls._upsert_items(db, [change.values for change in by_id], ["id"])
+            imported += sum(inserted for *_, inserted in upserted)
+            # Explicit ids may have moved past the sequence
+            await cls.sync_sequence(db, "items")
+        if by_key:
+            upserted = await cls._upsert_items(
+                db, [change.values for change in by_key], ["name", "category_id"]
+            )
+            imported += sum(inserted for *_, inserted in upserted)
+            for item_id, name, category_id, _ in upserted:
+                if (name, category_id) in links:
+                    links[item_id] = links.pop((name, category_id))
+
+        if links:
+            await cls.set_item_tags(db, links)
+
+        return imported, len(changes) - imported, len(plan.unchanged)
+
+    @classmethod
+    async def set_item_tags(cls, db: AsyncSession, links: dict[int, list[int]]) -> None:
+        """
+        Replace the tags of items with the given tag ids, by item id.
+        Only links that change are written; every item_tags write refreshes
+        the item's search vector.
+        """
+        wanted = {(item_id, tag_id) for item_id, tag_ids in links.items() for tag_id in tag_ids}
+        current = set(
+            (
+                await db.execute(
+                    select(item_tags.c.item_id, item_tags.c.tag_id).where(
+                        item_tags.c.item_id.in_(links)
+                    )
+                )
+            ).tuples()
+        )
+        stale = current - wanted
+        if stale:
+            await db.execute(
+                delete(item_tags).where(tuple_(item_tags.c.item_id, item_tags.c.tag_id).in_(stale))
+            )
+        missing = wanted - current
+        if missing:
+            await db.execute(
+                insert(item_tags),
+                [{"item_id": item_id, "tag_id": tag_id} for item_id, tag_id in sorted(missing)],
+            )
+
+    @classmethod
+    async def sync_sequence(cls, db: AsyncSession, table: str) -> None:
+        """
+        Move a table's PostgreSQL id sequence past the ids written explicitly,
+        so auto-generated ids don't collide with them.
+        Skipped on databases without sequences.
+        """
+        try:
+            async with db.begin_nested():
+                await db.execute(
+                    text(
+                        f"SELECT setval('{table}_id_seq', "
+                        f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {table}), false)"
+                    )
+                )
+        except DBAPIError:
+            pass
+
+    @classmethod
+    async def _upsert_items(
+        cls, db: AsyncSession, values: list[dict[str, Any]], conflict_columns: list[str]
+    ) -> list[Row]:
+        """
+        Insert items with a batched INSERT ... ON CONFLICT DO UPDATE.
+
+        Returns:
+            (id, name, category_id, inserted) for each row; inserted is False for
+            rows that updated an existing item
+        """
+        stmt = pg_insert(Item)
+        updated_columns = {
+            column: stmt.excluded[column] for column in values[0] if column not in conflict_columns
+        }
+        stmt = stmt.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={**updated_columns, "updated_at": func.now()},
+        ).returning(
+            Item.id,
+            Item.name,
+            Item.category_id,
+            # xmax is only set on rows the statement updated
+            literal_column("xmax = 0").label("inserted"),
+        )
+        return list(await db.execute(stmt, values))
+
+    @classmethod
+    async def _write_rows(
+        cls, db: AsyncSession, model: type[Category] | type[Tag], plan: RowPlan
+    ) -> None:
+        """
+        Insert and update the category or tag rows of a plan.
+        """
+        if plan.insert:
+            await db.execute(insert(model), plan.insert)
+        if plan.update:
+            await db.execute(update(model), plan.update)
+
+
+async def payload_records(data: dict[str, Any]) -> AsyncIterator[list[tuple[str, Any]]]:
+    """
+    Turn an export payload (the JSON export shape) into chunks of
+    (record type, data) records for RecordImport, in dependency order.
+    """
+    deleted = data.get("deleted") or {}
+    yield [
+        ("deleted", {"table": table, "id": record_id})
+        for table, record_ids in deleted.items()
+        for record_id in record_ids
+    ]
+    yield [("category", row) for row in data.get("categories", [])]
+    yield [("tag", row) for row in data.get("tags", [])]
+    yield [("item", row) for row in data.get("items", [])]
+
+
+class ItemBatchResult(NamedTuple):
+    """Outcome of one batch of item records."""
+
+    first_row: int
+    rows: int
+    imported: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    error: str | None = None
+
+
+class Changeset:
+    """
+    What an import would do, per table: the rows it would insert, update,
+    leave unchanged or delete, and the existing rows it doesn't mention
+    (orphaned), which a merge import leaves in place.
+
+    Rows are listed by id; item rows without an id that would be inserted
+    are listed by name and category_id. Item rows that would fail the import
+    by taking the name and category of another item are listed under
+    conflict, by their index among the import's items.
+    """
+
+    TABLES = ("categories", "tags", "items")
+    ACTIONS = ("insert", "update", "unchanged", "delete", "orphaned", "conflict")
+
+    def __init__(self):
+        self.changes: dict[str, dict[str, list[Any]]] = {
+            table: {action: [] for action in self.ACTIONS} for table in self.TABLES
+        }
+        # Existing ids the import deletes or matches to a row
+        self.deleted: dict[str, set[int]] = {table: set() for table in self.TABLES}
+        self.matched: dict[str, set[int]] = {table: set() for table in self.TABLES}
+
+    def add_deleted(self, table: str, record_ids: Iterable[int]) -> None:
+        for record_id in record_ids:
+            if record_id not in self.deleted[table]:
+                self.deleted[table].add(record_id)
+                self.changes[table]["delete"].append(record_id)
+
+    def add_rows(self, table: str, plan: RowPlan) -> None:
+        for action, rows in plan._asdict().items():
+            self.changes[table][action].extend(row["id"] for row in rows)
+        self.matched[table].update(row["id"] for row in plan.update + plan.unchanged)
+
+    def add_items(self, plan: ItemPlan, first_row: int = 0) -> None:
+        changes = self.changes["items"]
+        if plan.conflicts:
+            changes["conflict"].extend(ImportConflictError.from_plan(plan, first_row).errors)
+        for change in plan.insert:
+            if isinstance(change.ref, int):
+                changes["insert"].append(change.ref)
+            else:
+                changes["insert"].append({"name": change.ref[0], "category_id": change.ref[1]})
+        for action in ("update", "unchanged"):
+            item_ids = [change.existing_id for change in getattr(plan, action)]
+            changes[action].extend(item_ids)
+            self.matched["items"].update(item_ids)
+
+    def add_orphaned(self, table: str, existing_ids: Iterable[int]) -> None:
+        self.changes[table]["orphaned"] = sorted(
+            set(existing_ids) - self.deleted[table] - self.matched[table]
+        )
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "summary": {
+                table: {action: len(refs) for action, refs in actions.items()}
+                for table, actions in self.changes.items()
+            },
+            "changes": self.changes,
+        }
+
+
+class RecordImport:
+    """
+    One import of a stream of export records: ("deleted", {"table", "id"}),
+    ("category", row), ("tag", row) and ("item", row), as written by the
+    NDJSON export. Other record types are ignored.
+
+    Consecutive records of the same type are written together in batches of
+    up to DataImportService.BATCH_SIZE, so memory stays bounded by the batch
+    size. Records must arrive in export order: deletions, then categories and
+    tags, then the items referring to them.
+
+    The import runs in one transaction, committed once every record is
+    written, so a failure leaves nothing behind. With skip_failed_batches,
+    each step and item batch commits on its own instead.
+
+    A dry run reads the same records and plans the same batches but writes
+    nothing, collecting what it would do in a Changeset instead.
+    """
+
+    MODELS = {"categories": Category, "tags": Tag, "items": Item}
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        clear_existing: bool = False,
+        skip_failed_batches: bool = False,
+        dry_run: bool = False,
+    ):
+        """
+        Args:
+            db: Database session
+            clear_existing: Delete all existing data first
+            skip_failed_batches: Commit each step and item batch on its own,
+                and roll back and report an item batch that fails instead of
+                raising, carrying on with the next one
+            dry_run: Plan the import into self.changeset without writing
+        """
+        self.db = db
+        self.clear_existing = clear_existing
+        self.skip_failed_batches = skip_failed_batches
+        self.changeset = Changeset() if dry_run else None
+        self.categories = 0
+        self.tags = 0
+        self.item_rows = 0
+        self.items_imported = 0
+        self.items_updated = 0
+        self.items_unchanged = 0
+        self._pending_type: str | None = None
+        self._pending: list[Any] = []
+        self._maps: tuple[dict[str, int], dict[str, int]] | None = None
+        self._cleared_at: datetime | None = None
+        # Names of the categories and tags a dry run would write
+        self._planned_names: dict[str, dict[str, int]] = {"categories": {}, "tags": {}}
+
+    def counts(self) -> dict[str, int]:
+        return {
+            "categories_imported": self.categories,
+            "tags_imported": self.tags,
+            "items_imported": self.items_imported,
+            "items_updated": self.items_updated,
+            "items_unchanged": self.items_unchanged,
+        }
+
+    async def run(
+        self, chunks: AsyncIterable[list[tuple[str, Any]]]
+    ) -> AsyncIterator[ItemBatchResult]:
+        """
+        Import the records, yielding the result of each item batch.
+        """
+        if self.clear_existing:
+            if self.changeset is not None:
+                for table, model in self.MODELS.items():
+                    self.changeset.add_deleted(table, await self.db.scalars(select(model.id)))
+            else:
+                # Database time, the clock that stamps the clear's tombstones
+                self._cleared_at = await self.db.scalar(select(func.now()))
+                await DataImportService.clear(self.db)
+                await self._commit_step()
+
+        async for chunk in chunks:
+            for record_type, data in chunk:
+                if record_type != self._pending_type or (
+                    len(self._pending) >= DataImportService.BATCH_SIZE
+                ):
+                    result = await self._flush()
+                    if result is not None:
+                        yield result
+                    self._pending_type = record_type
+                self._pending.append(data)
+
+        result = await self._flush()
+        if result is not None:
+            yield result
+
+        if self.changeset is not None:
+            for table, model in self.MODELS.items():
+                self.changeset.add_orphaned(table, await self.db.scalars(select(model.id)))
+        else:
+            if self._cleared_at is not None:
+                await DeletedRecordService.forget_recreated(self.db, self._cleared_at)
+            await DeletedRecordService.prune(self.db)
+            await self.db.commit()
+
+    async def _commit_step(self) -> None:
+        """
+        Commit a written step or item batch when batches commit on their own;
+        otherwise it stays in the import's transaction.
+        """
+        if self.skip_failed_batches:
+            await self.db.commit()
+
+    async def _flush(self) -> ItemBatchResult | None:
+        """
+        Write the pending records, or plan them on a dry run.
+
+        Returns:
+            The batch result if the records were items
+        """
+        db = self.db
+        changeset = self.changeset
+        record_type, rows = self._pending_type, self._pending
+        self._pending = []
+        if not rows:
+            return None
+
+        if record_type == "deleted":
+            deleted: dict[str, list[int]] = {}
+            for row in rows:
+                deleted.setdefault(row["table"], []).append(row["id"])
+            if changeset is not None:
+                for table, record_ids in deleted.items():
+                    model = self.MODELS[table]
+                    changeset.add_deleted(
+                        table, await db.scalars(select(model.id).where(model.id.in_(record_ids)))
+                    )
+            else:
+                await DataImportService.apply_deletions(db, deleted)
+                await self._commit_step()
+        elif record_type in ("category", "tag"):
+            if record_type == "category":
+                table, model, fields = "categories", Category, CATEGORY_FIELDS
+                self.categories += len(rows)
+            else:
+                table, model, fields = "tags", Tag, TAG_FIELDS
+                self.tags += len(rows)
+
+            if changeset is not None:
+                plan = await DataImportService.plan_rows(
+                    db, model, fields, rows, changeset.deleted[table]
+                )
+                changeset.add_rows(table, plan)
+                self._planned_names[table].update(
+                    (row["name"], row["id"]) for row in plan.insert + plan.update
+                )
+            else:
+                if model is Category:
+                    await DataImportService.import_categories(db, rows)
+                else:
+                    await DataImportService.import_tags(db, rows)
+                await self._commit_step()
+                await DataImportService.sync_sequence(db, table)
+            self._maps = None
+        elif record_type == "item":
+            return await self._flush_items(rows)
+        return None
+
+    async def _flush_items(self, rows: list[dict[str, Any]]) -> ItemBatchResult:
+        db = self.db
+        changeset = self.changeset
+        if self._maps is None:
+            if changeset is not None:
+                self._maps = await self._planned_maps()
+            else:
+                await DataImportService.sync_sequence(db, "items")
+                self._maps = (
+                    await DataImportService.category_map(db),
+                    await DataImportService.tag_map(db),
+                )
+
+        first_row = self.item_rows
+        self.item_rows += len(rows)
+        if changeset is not None:
+            plan = await DataImportService.plan_item_batch(
+                db, rows, *self._maps, ignore_ids=changeset.deleted["items"]
+            )
+            changeset.add_items(plan, first_row)
+            imported, updated, unchanged = len(plan.insert), len(plan.update), len(plan.unchanged)
+        else:
+            try:
+                imported, updated, unchanged = await DataImportService.import_item_batch(
+                    db, rows, *self._maps, first_row=first_row
+                )
+                await self._commit_step()
+            except Exception as e:
+                if not self.skip_failed_batches:
+                    raise
+                await db.rollback()
+                return ItemBatchResult(first_row, len(rows), error=str(e))
+
+        self.items_imported += imported
+        self.items_updated += updated
+        self.items_unchanged += unchanged
+        return ItemBatchResult(first_row, len(rows), imported, updated, unchanged)
+
+    async def _planned_maps(self) -> tuple[dict[str, int], dict[str, int]]:
+        """
+        Name to id maps of the categories and tags as a dry run would leave
+        them: existing rows not deleted, then the rows it would write.
+        """
+        deleted = self.changeset.deleted
+        category_ids = {
+            name: category_id
+            for name, category_id in (await DataImportService.category_map(self.db)).items()
+            if category_id not in deleted["categories"]
+        }
+        tag_ids = {
+            name: tag_id
+            for name, tag_id in (await DataImportService.tag_map(self.db)).items()
+            if tag_id not in deleted["tags"]
+        }
+        category_ids.update(self._planned_names["categories"])
+        tag_ids.update(self._planned_names["tags"])
+        return category_ids, tag_ids
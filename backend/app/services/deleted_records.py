@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, exists, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Category, DeletedRecord, Item, Tag
+
+
+class DeletedRecordService:
+    """
+    Retention of the deletion tombstones delta exports report.
+
+    Tombstones are kept for DELETED_RECORDS_RETENTION_DAYS and pruned by
+    exports and imports, so a delta can only be taken from a point within
+    that window; anything older needs a full export.
+    """
+
+    MODELS = {"categories": Category, "tags": Tag, "items": Item}
+
+    @classmethod
+    def retention_start(cls, now: datetime) -> datetime:
+        """
+        Earliest point since which every deletion is still recorded, given
+        the current database time.
+        """
+        return now - timedelta(days=settings.DELETED_RECORDS_RETENTION_DAYS)
+
+    @classmethod
+    async def prune(cls, db: AsyncSession) -> None:
+        """
+        Delete the tombstones older than the retention window.
+        """
+        await db.execute(
+            delete(DeletedRecord).where(
+                DeletedRecord.deleted_at
+                < func.now() - timedelta(days=settings.DELETED_RECORDS_RETENTION_DAYS)
+            )
+        )
+
+    @classmethod
+    async def forget_recreated(cls, db: AsyncSession, since: datetime) -> None:
+        """
+        Delete the tombstones written since a point in time for records that
+        exist again, as after a clear_existing import puts most of the
+        catalogue back. Delta exports carry the re-created rows themselves.
+        """
+        for table, model in cls.MODELS.items():
+            await db.execute(
+                delete(DeletedRecord).where(
+                    DeletedRecord.table_name == table,
+                    DeletedRecord.deleted_at >= since,
+                    exists().where(model.id == DeletedRecord.record_id),
+                )
+            )
@@ -0,0 +1,234 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
+from datetime import UTC, datetime
+from typing import Any
+
+from app.core.database import SessionLocal
+from app.services.data_import import RecordImport, payload_records
+from app.services.import_reader import record_chunks
+from app.services.menu_cache import MenuCache
+
+
+class ImportJob:
+    """
+    State and progress of one background import.
+    """
+
+    def __init__(
+        self, clear_existing: bool, total_rows: int | None = None, total_bytes: int | None = None
+    ):
+        self.id = uuid.uuid4().hex
+        self.status = "pending"
+        self.clear_existing = clear_existing
+        # Progress is measured in item rows, or in bytes read for uploaded files
+        self.total_rows = total_rows
+        self.processed_rows = 0
+        self.total_bytes = total_bytes
+        self.processed_bytes = 0
+        self.categories_imported = 0
+        self.tags_imported = 0
+        self.items_imported = 0
+        self.items_updated = 0
+        self.items_unchanged = 0
+        self.errors: list[dict[str, Any]] = []
+        self.cancel_requested = False
+        self.created_at = datetime.now(UTC)
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self._started = 0.0
+        self._finished = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Report the job's progress, throughput and estimated time remaining.
+        """
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self._finished if self.finished else time.monotonic()) - self._started
+
+        rows_per_second = self.processed_rows / elapsed if elapsed > 0 else 0.0
+        eta_seconds = None
+        if not self.finished and elapsed > 0:
+            if self.total_rows is not None and self.processed_rows:
+                remaining = (self.total_rows - self.processed_rows) / rows_per_second
+                eta_seconds = round(remaining, 1)
+            elif self.total_bytes is not None and self.processed_bytes:
+                bytes_per_second = self.processed_bytes / elapsed
+                eta_seconds = round((self.total_bytes - self.processed_bytes) / bytes_per_second, 1)
+
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "clear_existing": self.clear_existing,
+            "total_rows": self.total_rows,
+            "processed_rows": self.processed_rows,
+            "total_bytes": self.total_bytes,
+            "processed_bytes": self.processed_bytes,
+            "categories_imported": self.categories_imported,
+            "tags_imported": self.tags_imported,
+            "items_imported": self.items_imported,
+            "items_updated": self.items_updated,
+            "items_unchanged": self.items_unchanged,
+            "errors": self.errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(rows_per_second, 1),
+            "eta_seconds": eta_seconds,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ImportJobs:
+    """
+    Registry of background imports running in this process.
+
+    Each job runs as an asyncio task with its own database session, committing
+    after every item batch, so the request that started it returns at once.
+    Jobs live in memory; the API runs as a single process.
+    """
+
+    # Finished jobs kept for status lookups
+    MAX_FINISHED_JOBS = 20
+
+    _jobs: OrderedDict[str, ImportJob] = OrderedDict()
+    _tasks: set[asyncio.Task] = set()
+
+    @classmethod
+    def start(cls, data: dict[str, Any], clear_existing: bool = False) -> ImportJob:
+        """
+        Start importing an export payload in the background.
+
+        Returns:
+            The new job
+        """
+        job = ImportJob(clear_existing, total_rows=len(data.get("items", [])))
+        return cls._launch(job, payload_records(data))
+
+    @classmethod
+    def start_file(cls, path: str, clear_existing: bool = False) -> ImportJob:
+        """
+        Start importing an export file in the background. The job takes
+        ownership of the file and deletes it when done.
+
+        Returns:
+            The new job
+        """
+        job = ImportJob(clear_existing, total_bytes=os.path.getsize(path))
+        fileobj = open(path, "rb")  # Closed by cleanup once the job finishes
+
+        async def chunks():
+            async for chunk in record_chunks(fileobj):
+                job.processed_bytes = fileobj.tell()
+                yield chunk
+
+        def cleanup():
+            fileobj.close()
+            os.unlink(path)
+
+        return cls._launch(job, chunks(), cleanup)
+
+    @classmethod
+    def get(cls, job_id: str) -> ImportJob | None:
+        return cls._jobs.get(job_id)
+
+    @classmethod
+    def cancel(cls, job_id: str) -> ImportJob | None:
+        """
+        Ask a job to stop after the batch in progress.
+        Batches already committed stay imported.
+
+        Returns:
+            The job, or None if no such job exists
+        """
+        job = cls._jobs.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel_requested = True
+        return job
+
+    @classmethod
+    def _launch(
+        cls,
+        job: ImportJob,
+        chunks: AsyncIterator[list[tuple[str, Any]]],
+        cleanup: Callable[[], None] | None = None,
+    ) -> ImportJob:
+        cls._jobs[job.id] = job
+        cls._prune()
+
+        task = asyncio.create_task(cls._run(job, chunks, cleanup))
+        # Keep a reference so the task isn't garbage collected mid-run
+        cls._tasks.add(task)
+        task.add_done_callback(cls._tasks.discard)
+        return job
+
+    @classmethod
+    async def _run(
+        cls,
+        job: ImportJob,
+        chunks: AsyncIterator[list[tuple[str, Any]]],
+        cleanup: Callable[[], None] | None,
+    ) -> None:
+        job.status = "running"
+        job.started_at = datetime.now(UTC)
+        job._started = time.monotonic()
+
+        async with SessionLocal() as db:
+            importer = RecordImport(db, job.clear_existing, skip_failed_batches=True)
+            try:
+                async with aclosing(importer.run(chunks)) as batches:
+                    async for batch in batches:
+                        job.processed_rows += batch.rows
+                        job.categories_imported = importer.categories
+                        job.tags_imported = importer.tags
+                        job.items_imported = importer.items_imported
+                        job.items_updated = importer.items_updated
+                        job.items_unchanged = importer.items_unchanged
+                        if batch.error is not None:
+                            # The failing batch was rolled back; the rest carries on
+                            job.errors.append(
+                                {
+                                    "first_row": batch.first_row,
+                                    "last_row": batch.first_row + batch.rows - 1,
+                                    "detail": batch.error,
+                                }
+                            )
+                        else:
+                            MenuCache.bump()
+
+                        if job.cancel_requested:
+                            job.status = "cancelled"
+                            break
+                    else:
+                        job.status = "completed"
+                job.categories_imported = importer.categories
+                job.tags_imported = importer.tags
+            except Exception as e:
+                await db.rollback()
+                job.status = "failed"
+                job.errors.append({"first_row": None, "last_row": None, "detail": str(e)})
+            finally:
+                await chunks.aclose()
+                if cleanup is not None:
+                    cleanup()
+                job.finished_at = datetime.now(UTC)
+                job._finished = time.monotonic()
+                MenuCache.bump()
+
+    @classmethod
+    def _prune(cls) -> None:
+        """
+        Forget the oldest finished jobs beyond MAX_FINISHED_JOBS.
+        """
+        finished = [job_id for job_id, job in cls._jobs.items() if job.finished]
+        for job_id in finished[: max(len(finished) - cls.MAX_FINISHED_JOBS, 0)]:
+            del cls._jobs[job_id]
@@ -0,0 +1,113 @@
+import asyncio
+import gzip
+import io
+import re
+from collections.abc import AsyncIterator, Iterator
+from itertools import islice
+from typing import IO, Any
+
+import ijson
+import orjson
+import zstandard
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# NDJSON exports start with a {"type": ...} record, JSON exports with {"version": ...}
+NDJSON_START = re.compile(rb'^\s*\{\s*"type"\s*:')
+
+# Where the JSON export shape keeps its records
+EXPORT_RECORD_PREFIXES = {
+    "categories.item": "category",
+    "tags.item": "tag",
+    "items.item": "item",
+}
+EXPORT_DELETED_PREFIXES = {
+    "deleted.categories.item": "categories",
+    "deleted.tags.item": "tags",
+    "deleted.items.item": "items",
+}
+
+
+class ImportFileError(ValueError):
+    """Raised when an uploaded import file cannot be read."""
+
+
+def open_decompressed(fileobj: IO[bytes]) -> IO[bytes]:
+    """
+    Open a seekable binary file for reading, decompressing it on the fly if it
+    starts with a gzip or zstd header.
+    """
+    fileobj.seek(0)
+    magic = fileobj.read(4)
+    fileobj.seek(0)
+
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    if magic == ZSTD_MAGIC:
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            fileobj, read_across_frames=True, closefd=False
+        )
+        return io.BufferedReader(reader)
+    return fileobj
+
+
+def read_export_records(fileobj: IO[bytes]) -> Iterator[tuple[str, Any]]:
+    """
+    Parse an export file incrementally into (record type, data) records.
+
+    Accepts the NDJSON export (one {"type": ..., "data": ...} record per line)
+    and the JSON export shape, either optionally gzip- or zstd-compressed.
+    Only one record is held in memory at a time.
+
+    Raises:
+        ImportFileError: If the file is not a readable export
+    """
+    try:
+        head = open_decompressed(fileobj).read(64)
+        stream = open_decompressed(fileobj)
+        if NDJSON_START.match(head):
+            yield from _read_ndjson(stream)
+        else:
+            yield from _read_json_export(stream)
+    except (OSError, EOFError, zstandard.ZstdError, ijson.JSONError, orjson.JSONDecodeError) as e:
+        raise ImportFileError(f"Invalid import file: {e}") from e
+    except (KeyError, TypeError) as e:
+        raise ImportFileError(f"Invalid import record: {e}") from e
+
+
+def _read_ndjson(stream: IO[bytes]) -> Iterator[tuple[str, Any]]:
+    for line in stream:
+        if line.strip():
+            record = orjson.loads(line)
+            yield record["type"], record.get("data")
+
+
+def _read_json_export(stream: IO[bytes]) -> Iterator[tuple[str, Any]]:
+    builder = None
+    builder_prefix = ""
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        # Inside a record: feed events until its map closes
+        if builder is not None:
+            builder.event(event, value)
+            if event == "end_map" and prefix == builder_prefix:
+                yield EXPORT_RECORD_PREFIXES[prefix], builder.value
+                builder = None
+        elif event == "start_map" and prefix in EXPORT_RECORD_PREFIXES:
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            builder_prefix = prefix
+        elif event == "number" and prefix in EXPORT_DELETED_PREFIXES:
+            yield "deleted", {"table": EXPORT_DELETED_PREFIXES[prefix], "id": value}
+
+
+async def record_chunks(
+    fileobj: IO[bytes], chunk_size: int = 1000
+) -> AsyncIterator[list[tuple[str, Any]]]:
+    """
+    Read an export file in chunks of records for RecordImport.
+    Parsing runs in a worker thread so it doesn't block the event loop.
+    """
+    records = read_export_records(fileobj)
+    while chunk := await asyncio.to_thread(lambda: list(islice(records, chunk_size))):
+        yield chunk
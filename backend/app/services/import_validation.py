@@ -0,0 +1,200 @@
+import asyncio
+import multiprocessing
+import os
+from collections.abc import AsyncIterable, AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from pydantic import BaseModel, ValidationError
+
+from app.schemas.item import CategoryImport, DeletedImport, ItemImport, TagImport
+
+# Schema and payload section of each record type; other types (meta) are ignored
+IMPORT_SCHEMAS: dict[str, tuple[type[BaseModel], str]] = {
+    "deleted": (DeletedImport, "deleted"),
+    "category": (CategoryImport, "categories"),
+    "tag": (TagImport, "tags"),
+    "item": (ItemImport, "items"),
+}
+
+
+class ValidationReport:
+    """
+    Outcome of validating an import: the number of rows checked and failed,
+    and the errors of the first failing rows.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.invalid_rows = 0
+        self.errors: list[dict[str, Any]] = []
+
+    @property
+    def valid(self) -> bool:
+        return self.invalid_rows == 0
+
+    def add(self, invalid_rows: int, errors: list[dict[str, Any]]) -> None:
+        self.invalid_rows += invalid_rows
+        room = ImportValidator.MAX_REPORTED_ERRORS - len(self.errors)
+        self.errors.extend(errors[: max(room, 0)])
+
+    def detail(self) -> dict[str, Any]:
+        return {
+            "message": "Import failed validation; nothing was imported",
+            "rows": self.rows,
+            "invalid_rows": self.invalid_rows,
+            "errors": self.errors,
+        }
+
+
+class ImportValidator:
+    """
+    Validates import records against the import schemas before anything is
+    written, so a bad row fails the import at once with a report of every
+    invalid row rather than deep into the import with a 500.
+
+    The first PARALLEL_MIN_ROWS rows are validated inline; past that, chunks
+    go to a process pool so large payloads are checked on every core. With a
+    single core available everything is validated inline.
+    """
+
+    # Rows validated per task
+    CHUNK_SIZE = 5000
+
+    # Smaller imports validate inline; pickling rows to workers costs about
+    # as much as validating them
+    PARALLEL_MIN_ROWS = 20000
+
+    # Pool size cap, and chunks handed to the pool ahead of their results
+    MAX_WORKERS = 4
+    MAX_PENDING_CHUNKS = 8
+
+    # Errors listed in the report; invalid_rows counts them all
+    MAX_REPORTED_ERRORS = 1000
+
+    _pool: ProcessPoolExecutor | None = None
+
+    @classmethod
+    def validate_payload(cls, data: dict[str, Any]) -> ValidationReport | None:
+        """
+        Check that an export payload's sections are lists (and "deleted" a map
+        of lists) before its rows are validated.
+
+        Returns:
+            A failed report, or None if the sections are well-formed
+        """
+        report = ValidationReport()
+        sections: list[tuple[tuple[str, ...], Any]] = [
+            ((section,), data.get(section, [])) for section in ("categories", "tags", "items")
+        ]
+        deleted = data.get("deleted") or {}
+        if isinstance(deleted, dict):
+            sections.extend(((("deleted", table), ids) for table, ids in deleted.items()))
+        else:
+            sections.append((("deleted",), deleted))
+
+        for loc, rows in sections:
+            if not isinstance(rows, list):
+                report.add(1, [{"loc": list(loc), "msg": "Input should be a valid list"}])
+        return None if report.valid else report
+
+    @classmethod
+    async def validate(cls, chunks: AsyncIterable[list[tuple[str, Any]]]) -> ValidationReport:
+        """
+        Validate a stream of (record type, data) records, as read for
+        RecordImport.
+
+        Returns:
+            The report; rows are located by section and index within it,
+            e.g. ["items", 12, "price"]
+        """
+        report = ValidationReport()
+        loop = asyncio.get_running_loop()
+        pending: list[asyncio.Future] = []
+
+        async for record_type, first_row, rows in cls._runs(chunks):
+            report.rows += len(rows)
+            if report.rows <= cls.PARALLEL_MIN_ROWS or cls._workers() < 2:
+                report.add(*cls.validate_rows(record_type, first_row, rows))
+                continue
+
+            pending.append(
+                loop.run_in_executor(
+                    cls._get_pool(), cls.validate_rows, record_type, first_row, rows
+                )
+            )
+            if len(pending) >= cls.MAX_PENDING_CHUNKS:
+                report.add(*await pending.pop(0))
+
+        for future in pending:
+            report.add(*await future)
+        return report
+
+    @classmethod
+    def validate_rows(
+        cls, record_type: str, first_row: int, rows: list[Any]
+    ) -> tuple[int, list[dict[str, Any]]]:
+        """
+        Validate consecutive rows of one record type. Runs in pool workers.
+
+        Returns:
+            Tuple of (invalid rows, their errors)
+        """
+        if record_type not in IMPORT_SCHEMAS:
+            return 0, []
+        schema, section = IMPORT_SCHEMAS[record_type]
+
+        invalid_rows = 0
+        errors = []
+        for index, row in enumerate(rows, start=first_row):
+            try:
+                schema.model_validate(row)
+            except ValidationError as e:
+                invalid_rows += 1
+                errors.extend(
+                    {"loc": [section, index, *error["loc"]], "msg": error["msg"]}
+                    for error in e.errors(include_url=False)
+                )
+        return invalid_rows, errors
+
+    @classmethod
+    async def _runs(
+        cls, chunks: AsyncIterable[list[tuple[str, Any]]]
+    ) -> AsyncIterator[tuple[str, int, list[Any]]]:
+        """
+        Regroup records into runs of up to CHUNK_SIZE rows of one type, with
+        the index of the run's first row within its type.
+        """
+        seen: dict[str, int] = {}
+        record_type: str | None = None
+        rows: list[Any] = []
+
+        async for chunk in chunks:
+            for next_type, data in chunk:
+                if next_type != record_type or len(rows) >= cls.CHUNK_SIZE:
+                    if rows:
+                        yield record_type, seen.get(record_type, 0), rows
+                        seen[record_type] = seen.get(record_type, 0) + len(rows)
+                    record_type, rows = next_type, []
+                rows.append(data)
+
+        if rows:
+            yield record_type, seen.get(record_type, 0), rows
+
+    @classmethod
+    def _workers(cls) -> int:
+        """
+        Worker processes to use: the CPUs this process may run on, up to MAX_WORKERS.
+        """
+        return min(len(os.sched_getaffinity(0)), cls.MAX_WORKERS)
+
+    @classmethod
+    def _get_pool(cls) -> ProcessPoolExecutor:
+        if cls._pool is None:
+            # Spawned rather than forked: workers shouldn't inherit the event
+            # loop or open database connections
+            cls._pool = ProcessPoolExecutor(
+                max_workers=cls._workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return cls._pool
@@ -0,0 +1,191 @@
+from typing import Any
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Item, Tag, item_tags
+from app.schemas.item import (
+    ItemBatchCreate,
+    ItemBatchDelete,
+    ItemBatchFilter,
+    ItemBatchUpdate,
+    ItemUpdate,
+)
+from app.services.data_import import DataImportService
+
+
+class ItemBatchService:
+    """
+    Batch changes to items as set-based statements: one DELETE, one
+    executemany UPDATE and one multi-row INSERT per batch, instead of a load,
+    commit and refresh per item. Callers commit, so a batch applies as a
+    whole or not at all.
+    """
+
+    @classmethod
+    async def apply_operations(
+        cls,
+        db: AsyncSession,
+        operations: list[ItemBatchCreate | ItemBatchUpdate | ItemBatchDelete],
+    ) -> list[dict[str, Any]]:
+        """
+        Apply a list of create, update and delete operations: deletes first,
+        then updates, then creates.
+
+        Raises:
+            ValueError: If an item appears in more than one operation
+
+        Returns:
+            A result per operation, in order: its index, op, item id and
+            status (created, updated, deleted or not_found)
+        """
+        seen: set[int] = set()
+        for operation in operations:
+            if isinstance(operation, ItemBatchCreate):
+                continue
+            if operation.id in seen:
+                raise ValueError(f"Item {operation.id} appears in more than one operation")
+            seen.add(operation.id)
+
+        results: list[dict[str, Any]] = [
+            {"index": index, "op": operation.op, "id": getattr(operation, "id", None)}
+            for index, operation in enumerate(operations)
+        ]
+        deletes = [i for i, op in enumerate(operations) if isinstance(op, ItemBatchDelete)]
+        updates = [i for i, op in enumerate(operations) if isinstance(op, ItemBatchUpdate)]
+        creates = [i for i, op in enumerate(operations) if isinstance(op, ItemBatchCreate)]
+        links: dict[int, list[int]] = {}
+
+        if deletes:
+            # Tag links go with the items (ON DELETE CASCADE)
+            deleted = set(
+                await db.scalars(
+                    delete(Item)
+                    .where(Item.id.in_([operations[i].id for i in deletes]))
+                    .returning(Item.id)
+                    .execution_options(synchronize_session=False)
+                )
+            )
+            for i in deletes:
+                results[i]["status"] = "deleted" if operations[i].id in deleted else "not_found"
+
+        if updates:
+            existing = set(
+                await db.scalars(
+                    select(Item.id).where(Item.id.in_([operations[i].id for i in updates]))
+                )
+            )
+            rows = []
+            for i in updates:
+                operation = operations[i]
+                if operation.id not in existing:
+                    results[i]["status"] = "not_found"
+                    continue
+                results[i]["status"] = "updated"
+                values = operation.patch.model_dump(exclude_unset=True, exclude={"tag_ids"})
+                if values:
+                    rows.append({"id": operation.id, **values})
+                if operation.patch.tag_ids is not None:
+                    links[operation.id] = operation.patch.tag_ids
+            if rows:
+                # Bulk UPDATE by primary key, executemany per set of patched columns
+                await db.execute(update(Item), rows)
+
+        if creates:
+            created = await db.scalars(
+                insert(Item).returning(Item.id, sort_by_parameter_order=True),
+                [operations[i].item.model_dump(exclude={"tag_ids"}) for i in creates],
+            )
+            for i, item_id in zip(creates, created, strict=True):
+                results[i].update(id=item_id, status="created")
+                if operations[i].item.tag_ids:
+                    links[item_id] = operations[i].item.tag_ids
+
+        if links:
+            await cls._set_tags(db, links)
+        return results
+
+    @classmethod
+    async def apply_filter(
+        cls,
+        db: AsyncSession,
+        item_filter: ItemBatchFilter,
+        patch: ItemUpdate | None = None,
+        delete_items: bool = False,
+    ) -> list[dict[str, Any]]:
+        """
+        Apply a patch to, or delete, every item matching a filter, in one
+        statement.
+
+        Returns:
+            A result per matched item: its id and status (updated or deleted)
+        """
+        conditions = cls._filter_conditions(item_filter)
+
+        if delete_items:
+            deleted = await db.scalars(
+                delete(Item)
+                .where(*conditions)
+                .returning(Item.id)
+                .execution_options(synchronize_session=False)
+            )
+            return [{"id": item_id, "status": "deleted"} for item_id in deleted]
+
+        values = patch.model_dump(exclude_unset=True, exclude={"tag_ids"})
+        if values:
+            item_ids = list(
+                await db.scalars(
+                    update(Item)
+                    .where(*conditions)
+                    .values(**values)
+                    .returning(Item.id)
+                    .execution_options(synchronize_session=False)
+                )
+            )
+        else:
+            item_ids = list(await db.scalars(select(Item.id).where(*conditions)))
+
+        if patch.tag_ids is not None and item_ids:
+            await cls._set_tags(db, {item_id: patch.tag_ids for item_id in item_ids})
+        return [{"id": item_id, "status": "updated"} for item_id in item_ids]
+
+    @classmethod
+    def _filter_conditions(cls, item_filter: ItemBatchFilter) -> list:
+        """
+        Build the WHERE conditions for the criteria given in a filter.
+        """
+        given = item_filter.model_fields_set
+        conditions = []
+        if "ids" in given:
+            conditions.append(Item.id.in_(item_filter.ids or []))
+        if "category_id" in given:
+            conditions.append(Item.category_id.is_not_distinct_from(item_filter.category_id))
+        if "tag_ids" in given:
+            conditions.append(
+                Item.id.in_(
+                    select(item_tags.c.item_id).where(
+                        item_tags.c.tag_id.in_(item_filter.tag_ids or [])
+                    )
+                )
+            )
+        if "producer" in given:
+            conditions.append(Item.producer.is_not_distinct_from(item_filter.producer))
+        if "is_published" in given:
+            conditions.append(Item.is_published.is_not_distinct_from(item_filter.is_published))
+        return conditions
+
+    @classmethod
+    async def _set_tags(cls, db: AsyncSession, links: dict[int, list[int]]) -> None:
+        """
+        Replace item tags, ignoring tag ids that don't exist, as single-item
+        updates do.
+        """
+        known = set(
+            await db.scalars(
+                select(Tag.id).where(Tag.id.in_({t for tag_ids in links.values() for t in tag_ids}))
+            )
+        )
+        await DataImportService.set_item_tags(
+            db,
+            {item_id: [t for t in tag_ids if t in known] for item_id, tag_ids in links.items()},
+        )
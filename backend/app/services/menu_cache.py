@@ -0,0 +1,114 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+# Row counts and latest modification times of everything the public menu shows.
+# The item_tags checksum catches tag links being swapped without a count change.
+MENU_STATE_SQL = text(
+    """
+    SELECT
+        (SELECT count(*) FROM items),
+        (SELECT max(coalesce(updated_at, created_at)) FROM items),
+        (SELECT count(*) FROM categories),
+        (SELECT max(coalesce(updated_at, created_at)) FROM categories),
+        (SELECT count(*) FROM tags),
+        (SELECT max(coalesce(updated_at, created_at)) FROM tags),
+        (SELECT count(*) FROM item_tags),
+        (SELECT coalesce(sum(item_id::bigint * 1000003 + tag_id), 0) FROM item_tags)
+    """
+)
+
+
+class MenuCache:
+    """
+    Per-process cache of public menu responses.
+    Entries are keyed by a global menu version; any write to the menu bumps
+    the version, which invalidates every cached response at once.
+    """
+
+    _version = 0
+    _entries: OrderedDict[tuple[int, Hashable], tuple[float, Any]] = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def version(cls) -> int:
+        """
+        Get the current menu version.
+        Capture it before reading from the database and pass it to get/set.
+        """
+        return cls._version
+
+    @classmethod
+    def bump(cls) -> None:
+        """
+        Invalidate all cached responses after the menu changed.
+        """
+        with cls._lock:
+            cls._version += 1
+            cls._entries.clear()
+
+    @classmethod
+    def get(cls, version: int, key: Hashable) -> Any | None:
+        """
+        Look up a cached response.
+
+        Args:
+            version: Menu version captured by the caller
+            key: Endpoint name and query parameters identifying the response
+
+        Returns:
+            The cached response, or None if missing or expired
+        """
+        with cls._lock:
+            entry = cls._entries.get((version, key))
+            if entry is None:
+                return None
+
+            stored_at, value = entry
+            # Expire entries so other worker processes pick up their writes too
+            if time.monotonic() - stored_at > settings.MENU_CACHE_TTL_SECONDS:
+                del cls._entries[(version, key)]
+                return None
+
+            cls._entries.move_to_end((version, key))
+            return value
+
+    @classmethod
+    def set(cls, version: int, key: Hashable, value: Any) -> None:
+        """
+        Store a response, evicting the least recently used entries when full.
+        Responses computed against an outdated menu version are discarded.
+        """
+        with cls._lock:
+            if version != cls._version:
+                return
+
+            cls._entries[(version, key)] = (time.monotonic(), value)
+            cls._entries.move_to_end((version, key))
+            while len(cls._entries) > settings.MENU_CACHE_MAX_ENTRIES:
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    async def fingerprint(cls, db: AsyncSession) -> str:
+        """
+        Get a digest of the menu's last-modified state.
+        It is derived from the database rather than the in-process version, so
+        every worker computes the same value; it is cached like any response.
+        """
+        version = cls.version()
+        cached = cls.get(version, "fingerprint")
+        if cached is not None:
+            return cached
+
+        state = (await db.execute(MENU_STATE_SQL)).one()
+        digest = hashlib.sha256(repr(tuple(state)).encode()).hexdigest()
+        cls.set(version, "fingerprint", digest)
+        return digest
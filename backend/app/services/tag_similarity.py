@@ -0,0 +1,498 @@
+import asyncio
+import re
+import time
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import DeletedRecord, Item, item_tags
+from app.services.deleted_records import DeletedRecordService
+from app.services.menu_cache import MenuCache
+
+TOKEN_PATTERN = re.compile(r"[^\W\d_]{2,}")
+
+
+def tokenize(name: str | None, description: str | None) -> Counter:
+    """
+    Count the words of an item's name and description, lowercased; numbers
+    and single letters are left out.
+    """
+    return Counter(TOKEN_PATTERN.findall(f"{name or ''} {description or ''}".lower()))
+
+
+def _with_shape(matrix: sparse.csr_matrix, shape: tuple[int, int]) -> sparse.csr_matrix:
+    """
+    View a CSR matrix as a wider one, sharing its arrays.
+    """
+    return sparse.csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=shape)
+
+
+class SimilarityBlock(NamedTuple):
+    """
+    Consecutive rows of a SimilarityModel, as wide as the vocabulary and tag
+    list were when they were added.
+    """
+
+    counts: sparse.csr_matrix  # Sublinear term frequencies
+    matrix: sparse.csr_matrix  # Normalized TF-IDF rows, float32
+    row_tags: sparse.csr_matrix  # Tag links
+
+
+class SimilarityModel:
+    """
+    One snapshot of the model SimilarTagSuggester scores against. Snapshots
+    are never changed once built: a sync builds the next one from the last,
+    sharing the blocks of rows it leaves alone, so suggestions can keep
+    reading the old one meanwhile.
+
+    A sync appends the changed items as a new block, weighted with the IDF of
+    the last full reweight, and retires the rows they replace. Only once
+    retired rows, blocks or the number of items drift too far are the blocks
+    merged, retired rows dropped and every row reweighted.
+    """
+
+    # Most similar items voting on a suggestion, and the similarity they need
+    NEIGHBOURS = 10
+    MIN_SIMILARITY = 0.1
+
+    # Share of the neighbours' votes a tag needs, and suggestions per item
+    MIN_SCORE = 0.3
+    MAX_SUGGESTIONS = 5
+
+    # Queries scored per block of dense similarities
+    QUERY_BLOCK_SIZE = 128
+
+    # Full reweight triggers: share of retired rows, blocks, and change in
+    # live items since the last reweight
+    COMPACT_RATIO = 0.25
+    MAX_BLOCKS = 8
+    REWEIGHT_RATIO = 0.1
+
+    def __init__(
+        self,
+        vocabulary: dict[str, int],
+        tag_columns: dict[int, int],
+        tag_ids: list[int],
+        item_rows: dict[int, int],
+        item_contents: dict[int, int],
+        blocks: list[SimilarityBlock],
+        live: np.ndarray,
+        document_frequency: np.ndarray,
+        idf: np.ndarray,
+        weighted_documents: int,
+    ):
+        self.vocabulary = vocabulary
+        self.tag_columns = tag_columns
+        self.tag_ids = tag_ids
+        self.item_rows = item_rows
+        self.item_contents = item_contents
+        self.blocks = blocks
+        self.live = live
+        self.document_frequency = document_frequency
+        self.idf = idf
+        self.weighted_documents = weighted_documents
+        # First row of each block, and the total
+        self.offsets = np.cumsum([0] + [block.counts.shape[0] for block in blocks])
+
+    @classmethod
+    def empty(cls) -> "SimilarityModel":
+        return cls({}, {}, [], {}, {}, [], np.zeros(0, dtype=bool), np.zeros(0), np.zeros(0), 0)
+
+    def updated(
+        self, rows: list[tuple[int, str, str | None, list[int]]], deleted: list[int]
+    ) -> "SimilarityModel":
+        """
+        Build the next snapshot: retire the rows of changed and deleted items
+        and append rows for the changed items that have tags and words.
+        """
+        vocabulary = dict(self.vocabulary)
+        tag_columns = dict(self.tag_columns)
+        tag_ids = list(self.tag_ids)
+        item_rows = dict(self.item_rows)
+        item_contents = dict(self.item_contents)
+
+        # Rows re-read within SYNC_OVERLAP usually haven't changed
+        changed = []
+        for item_id, name, description, item_tag_ids in rows:
+            content = hash((name, description, frozenset(item_tag_ids)))
+            if item_contents.get(item_id) != content:
+                item_contents[item_id] = content
+                changed.append((item_id, name, description, item_tag_ids))
+        for item_id in deleted:
+            item_contents.pop(item_id, None)
+
+        live = self.live.copy()
+        retired = []
+        for item_id in [row[0] for row in changed] + deleted:
+            row = item_rows.pop(item_id, None)
+            if row is not None:
+                live[row] = False
+                retired.append(row)
+
+        # Rows to append, as coordinates of the counts and tag matrices
+        first_row = len(live)
+        new_rows = 0
+        count_rows, count_columns, count_values = [], [], []
+        tag_rows, tag_columns_added = [], []
+        for item_id, name, description, item_tag_ids in changed:
+            words = tokenize(name, description)
+            if not item_tag_ids or not words:
+                continue
+            item_rows[item_id] = first_row + new_rows
+            for word, count in words.items():
+                count_rows.append(new_rows)
+                count_columns.append(vocabulary.setdefault(word, len(vocabulary)))
+                count_values.append(1.0 + np.log(count))
+            for tag_id in set(item_tag_ids):
+                if tag_id not in tag_columns:
+                    tag_columns[tag_id] = len(tag_ids)
+                    tag_ids.append(tag_id)
+                tag_rows.append(new_rows)
+                tag_columns_added.append(tag_columns[tag_id])
+            new_rows += 1
+
+        # Document frequencies over live rows: drop the retired, add the new
+        document_frequency = np.zeros(len(vocabulary))
+        document_frequency[: len(self.document_frequency)] = self.document_frequency
+        for row in retired:
+            block = int(np.searchsorted(self.offsets, row, side="right")) - 1
+            counts = self.blocks[block].counts
+            local = row - self.offsets[block]
+            document_frequency[counts.indices[counts.indptr[local] : counts.indptr[local + 1]]] -= 1
+        np.add.at(document_frequency, np.array(count_columns, dtype=np.int64), 1)
+
+        added = SimilarityBlock(
+            counts=sparse.csr_matrix(
+                (count_values, (count_rows, count_columns)), shape=(new_rows, len(vocabulary))
+            ),
+            matrix=None,
+            row_tags=sparse.csr_matrix(
+                ([1.0] * len(tag_rows), (tag_rows, tag_columns_added)),
+                shape=(new_rows, len(tag_ids)),
+            ),
+        )
+        live = np.concatenate([live, np.ones(new_rows, dtype=bool)])
+        documents = int(live.sum())
+        blocks = [*self.blocks, added] if new_rows else list(self.blocks)
+
+        model = SimilarityModel(
+            vocabulary,
+            tag_columns,
+            tag_ids,
+            item_rows,
+            item_contents,
+            blocks,
+            live,
+            document_frequency,
+            self.idf,
+            self.weighted_documents,
+        )
+        if (
+            (~live).sum() > self.COMPACT_RATIO * len(live)
+            or len(blocks) > self.MAX_BLOCKS
+            or abs(documents - self.weighted_documents)
+            > self.REWEIGHT_RATIO * self.weighted_documents
+        ):
+            return model._reweighted()
+
+        # Words new since the last reweight get their IDF as of now
+        idf = np.empty(len(vocabulary))
+        idf[: len(self.idf)] = self.idf
+        idf[len(self.idf) :] = (
+            np.log((1 + documents) / (1 + document_frequency[len(self.idf) :])) + 1.0
+        )
+        model.idf = idf
+        if new_rows:
+            model.blocks[-1] = added._replace(matrix=model._weigh(added.counts))
+        return model
+
+    def _reweighted(self) -> "SimilarityModel":
+        """
+        Merge the blocks into one without the retired rows, and weigh every
+        row with IDF recomputed over them.
+        """
+        shape = (len(self.vocabulary), len(self.tag_ids))
+        keep = np.flatnonzero(self.live)
+        counts = sparse.vstack(
+            [_with_shape(block.counts, (block.counts.shape[0], shape[0])) for block in self.blocks]
+            or [sparse.csr_matrix((0, shape[0]))],
+            format="csr",
+        )[keep]
+        row_tags = sparse.vstack(
+            [
+                _with_shape(block.row_tags, (block.row_tags.shape[0], shape[1]))
+                for block in self.blocks
+            ]
+            or [sparse.csr_matrix((0, shape[1]))],
+            format="csr",
+        )[keep]
+        renumber = np.full(len(self.live), -1, dtype=np.int64)
+        renumber[keep] = np.arange(len(keep))
+
+        documents = len(keep)
+        model = SimilarityModel(
+            self.vocabulary,
+            self.tag_columns,
+            self.tag_ids,
+            {item_id: int(renumber[row]) for item_id, row in self.item_rows.items()},
+            self.item_contents,
+            [],
+            np.ones(documents, dtype=bool),
+            self.document_frequency,
+            np.log((1 + documents) / (1 + self.document_frequency)) + 1.0,
+            documents,
+        )
+        model.blocks = [SimilarityBlock(counts, model._weigh(counts), row_tags)]
+        model.offsets = np.array([0, documents])
+        return model
+
+    def _weigh(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        """
+        Weigh term frequency rows with the IDF and L2-normalize them.
+        """
+        weighted = counts.multiply(self.idf[: counts.shape[1]]).tocsr()
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        scale = np.zeros(len(norms))
+        np.divide(1.0, norms, out=scale, where=norms > 0)
+        return (sparse.diags(scale) @ weighted).astype(np.float32).tocsr()
+
+    def suggest(self, items: list[Mapping[str, Any]]) -> list[list[tuple[int, float]]]:
+        """
+        Suggest tags for items from their name and description.
+
+        Returns:
+            (tag id, score) pairs for each item, in order, best first; the
+            score is the share of the similarity-weighted neighbour votes
+        """
+        queries = self._query_matrix(items)
+        suggestions: list[list[tuple[int, float]]] = []
+        for start in range(0, queries.shape[0], self.QUERY_BLOCK_SIZE):
+            suggestions.extend(self._vote(queries[start : start + self.QUERY_BLOCK_SIZE]))
+        return suggestions
+
+    def _query_matrix(self, items: Iterable[Mapping[str, Any]]) -> sparse.csr_matrix:
+        """
+        Build normalized TF-IDF rows for query items; words the model has
+        never seen are ignored.
+        """
+        rows, columns, values = [], [], []
+        count = 0
+        for count, item in enumerate(items, start=1):
+            for word, occurrences in tokenize(item.get("name"), item.get("description")).items():
+                column = self.vocabulary.get(word)
+                if column is not None:
+                    rows.append(count - 1)
+                    columns.append(column)
+                    values.append((1.0 + np.log(occurrences)) * self.idf[column])
+
+        queries = sparse.csr_matrix((values, (rows, columns)), shape=(count, len(self.vocabulary)))
+        norms = np.sqrt(np.asarray(queries.multiply(queries).sum(axis=1)).ravel())
+        scale = np.zeros(len(norms))
+        np.divide(1.0, norms, out=scale, where=norms > 0)
+        return sparse.diags(scale) @ queries
+
+    def _vote(self, queries: sparse.csr_matrix) -> list[list[tuple[int, float]]]:
+        """
+        Let each query's nearest neighbours vote for their tags.
+        """
+        if not self.live.any():
+            return [[] for _ in range(queries.shape[0])]
+
+        # Sparse rows times a dense block of queries: common words make the
+        # similarities nearly dense anyway. Retired rows never match
+        dense = queries.T.astype(np.float32).toarray()
+        similarities = np.ascontiguousarray(
+            np.vstack([block.matrix @ dense[: block.matrix.shape[1]] for block in self.blocks]).T
+        )
+        similarities[:, ~self.live] = 0.0
+        k = min(self.NEIGHBOURS, similarities.shape[1])
+        neighbours = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        weights = np.take_along_axis(similarities, neighbours, axis=1)
+        weights[weights < self.MIN_SIMILARITY] = 0.0
+
+        # Similarity-weighted tag votes, as a share of each query's total
+        voters = sparse.csr_matrix(
+            (weights.ravel(), (np.repeat(np.arange(len(neighbours)), k), neighbours.ravel())),
+            shape=similarities.shape,
+        ).tocsc()
+        votes = np.zeros((len(neighbours), len(self.tag_ids)))
+        for block, start, stop in zip(
+            self.blocks, self.offsets[:-1], self.offsets[1:], strict=True
+        ):
+            row_tags = _with_shape(block.row_tags, (block.row_tags.shape[0], len(self.tag_ids)))
+            votes += (voters[:, start:stop] @ row_tags).toarray()
+        totals = weights.sum(axis=1, keepdims=True)
+        scores = np.divide(votes, totals, out=np.zeros_like(votes), where=totals > 0)
+
+        suggestions = []
+        for row in scores:
+            best = np.argsort(-row)[: self.MAX_SUGGESTIONS]
+            suggestions.append(
+                [
+                    (self.tag_ids[column], round(float(row[column]), 3))
+                    for column in best
+                    if row[column] >= self.MIN_SCORE
+                ]
+            )
+        return suggestions
+
+
+class SimilarTagSuggester:
+    """
+    Suggests tags for an item from the tags of the most similar tagged items,
+    so house tags ("Pinot Grigio", "White Wine") are learned from the menu
+    instead of having to be listed in TagSuggestionService.TAG_KEYWORDS.
+
+    Tagged items are kept as a TF-IDF matrix of the words in their names and
+    descriptions (sublinear term frequency, rows L2-normalized). Queries are
+    scored against every row with one sparse product, and each of the
+    NEIGHBOURS most similar items votes for its tags with its similarity.
+
+    The model (a SimilarityModel) lives in the process and follows the
+    database incrementally: after a menu write (or MENU_CACHE_TTL_SECONDS,
+    for other workers' writes) items changed or deleted since the last sync
+    replace or retire their rows. Syncs and scoring run in worker threads, so
+    the event loop keeps serving requests; the lock only keeps syncs from
+    running twice, and suggestions read whichever snapshot is current.
+    """
+
+    # Rows changed shortly before a sync may commit after it with earlier
+    # timestamps, so each sync re-reads this far back
+    SYNC_OVERLAP = timedelta(seconds=60)
+
+    # Items read per chunk while syncing
+    SYNC_CHUNK_SIZE = 1000
+
+    _lock = asyncio.Lock()
+    _model = SimilarityModel.empty()
+    _synced_at: datetime | None = None
+    _synced_version: int | None = None
+    _checked_at = 0.0
+    # Background syncs in progress, referenced so they aren't garbage collected
+    _tasks: set[asyncio.Task] = set()
+
+    @classmethod
+    async def suggest(
+        cls, db: AsyncSession, items: Iterable[Mapping[str, Any]], wait: bool = True
+    ) -> list[list[tuple[int, float]]]:
+        """
+        Suggest tags for items from their name and description.
+
+        The model is synced with the database first if the menu may have
+        changed. With wait=False a stale model is used as it is and synced in
+        the background instead, so the request never waits for a sync; until
+        the first sync finishes, nothing is suggested.
+
+        Returns:
+            (tag id, score) pairs for each item, in order, best first; the
+            score is the share of the similarity-weighted neighbour votes
+        """
+        if wait:
+            await cls.refresh(db)
+        elif not cls._is_current(MenuCache.version()):
+            cls._refresh_in_background()
+        return await asyncio.to_thread(cls._model.suggest, list(items))
+
+    @classmethod
+    async def refresh(cls, db: AsyncSession) -> None:
+        """
+        Sync the model with the items changed or deleted since the last sync,
+        building it from every tagged item the first time.
+        """
+        version = MenuCache.version()
+        if cls._is_current(version):
+            return
+
+        async with cls._lock:
+            # Another request may have synced while this one waited
+            if cls._is_current(version):
+                return
+
+            # Database time, the clock that stamps updated_at and deletions
+            synced_at = await db.scalar(select(func.now()))
+            model = cls._model
+            since = cls._synced_at - cls.SYNC_OVERLAP if cls._synced_at else None
+            # Deletions that far back may be pruned already, so start over
+            if since is not None and since < DeletedRecordService.retention_start(synced_at):
+                model = SimilarityModel.empty()
+                since = None
+
+            query = (
+                select(
+                    Item.id,
+                    Item.name,
+                    Item.description,
+                    func.array_remove(func.array_agg(item_tags.c.tag_id), None),
+                )
+                .outerjoin(item_tags, item_tags.c.item_id == Item.id)
+                .group_by(Item.id)
+            )
+            if since is not None:
+                query = query.where(func.coalesce(Item.updated_at, Item.created_at) > since)
+            # Streamed in chunks, so converting rows doesn't hold up the event loop
+            rows = []
+            result = await db.stream(query.execution_options(yield_per=cls.SYNC_CHUNK_SIZE))
+            async for partition in result.tuples().partitions():
+                rows.extend(partition)
+
+            deleted: list[int] = []
+            if since is not None:
+                deleted = list(
+                    await db.scalars(
+                        select(DeletedRecord.record_id).where(
+                            DeletedRecord.table_name == "items", DeletedRecord.deleted_at > since
+                        )
+                    )
+                )
+
+            if rows or deleted or since is None:
+                model = await asyncio.to_thread(model.updated, rows, deleted)
+            cls._model = model
+            cls._synced_at = synced_at
+            cls._synced_version = version
+            cls._checked_at = time.monotonic()
+
+    @classmethod
+    def _refresh_in_background(cls) -> None:
+        """
+        Start a sync with its own session, unless one is already running.
+        """
+        if cls._tasks or cls._lock.locked():
+            return
+        task = asyncio.create_task(cls._background_refresh())
+        cls._tasks.add(task)
+        task.add_done_callback(cls._tasks.discard)
+
+    @classmethod
+    async def _background_refresh(cls) -> None:
+        async with SessionLocal() as db:
+            await cls.refresh(db)
+
+    @classmethod
+    def _is_current(cls, version: int) -> bool:
+        """
+        Check whether the model was synced since the last menu write in this
+        process, recently enough to have seen other workers' writes too.
+        """
+        return (
+            cls._synced_at is not None
+            and version == cls._synced_version
+            and time.monotonic() - cls._checked_at < settings.MENU_CACHE_TTL_SECONDS
+        )
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Drop the model; the next suggestion rebuilds it from the database.
+        """
+        cls._model = SimilarityModel.empty()
+        cls._synced_at = None
+        cls._synced_version = None
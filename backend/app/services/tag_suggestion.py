@@ -1,4 +1,6 @@
 import re
+from collections.abc import Iterable, Mapping
+from typing import Any
 
 
 class TagSuggestionService:
@@ -69,6 +71,9 @@ class TagSuggestionService:
         "wheat": ["wheat", "hefeweizen", "witbier"],
     }
 
+    # TAG_KEYWORDS compiled into one pattern, see _keyword_matcher
+    _matcher: tuple[re.Pattern, dict[str, frozenset[str]]] | None = None
+
     @classmethod
     def suggest_tags_from_text(cls, text: str) -> set[str]:
         """
@@ -83,18 +88,46 @@ class TagSuggestionService:
         if not text:
             return set()
 
-        text_lower = text.lower()
         suggested_tags = set()
+        pattern, keyword_tags = cls._keyword_matcher()
+        for match in pattern.finditer(text.lower()):
+            suggested_tags.update(keyword_tags[match.group(1)])
+
+        return suggested_tags
 
-        for tag_name, keywords in cls.TAG_KEYWORDS.items():
+    @classmethod
+    def _keyword_matcher(cls) -> tuple[re.Pattern, dict[str, frozenset[str]]]:
+        """
+        Compile TAG_KEYWORDS into one regex, built on first use.
+
+        The pattern finds, at every word boundary, the longest keyword that
+        matches there as a whole word; the lookahead lets matches overlap so
+        "pale" inside "india pale ale" is still seen. Each keyword maps to its
+        own tags plus those of shorter keywords it starts with at a word
+        boundary, which match at the same place.
+
+        Returns:
+            Tuple of (pattern, keyword -> tag names)
+        """
+        if cls._matcher is None:
+            tags_by_keyword: dict[str, set[str]] = {}
+            for tag_name, keywords in cls.TAG_KEYWORDS.items():
+                for keyword in keywords:
+                    tags_by_keyword.setdefault(keyword, set()).add(tag_name)
+
+            keywords = sorted(tags_by_keyword, key=len, reverse=True)
+            keyword_tags = {}
             for keyword in keywords:
-                # Use word boundaries to avoid partial matches
-                pattern = r"\b" + re.escape(keyword) + r"\b"
-                if re.search(pattern, text_lower):
-                    suggested_tags.add(tag_name)
-                    break  # Found a match for this tag, move to next tag
+                tags = set(tags_by_keyword[keyword])
+                for prefix in keywords:
+                    if len(prefix) < len(keyword) and re.match(re.escape(prefix) + r"\b", keyword):
+                        tags |= tags_by_keyword[prefix]
+                keyword_tags[keyword] = frozenset(tags)
 
-        return suggested_tags
+            alternation = "|".join(re.escape(keyword) for keyword in keywords)
+            pattern = re.compile(rf"\b(?=({alternation})\b)")
+            cls._matcher = (pattern, keyword_tags)
+        return cls._matcher
 
     @classmethod
     def suggest_tags_from_item(
@@ -131,6 +164,28 @@ class TagSuggestionService:
 
         return suggested_tags
 
+    @classmethod
+    def suggest_tags_for_items(cls, items: Iterable[Mapping[str, Any]]) -> list[set[str]]:
+        """
+        Suggest tags for many items at once.
+
+        Args:
+            items: Mappings with the suggest_tags_from_item arguments
+                (name, and optionally description, abv and origin)
+
+        Returns:
+            Set of suggested tag names for each item, in order
+        """
+        return [
+            cls.suggest_tags_from_item(
+                name=item["name"],
+                description=item.get("description"),
+                abv=item.get("abv"),
+                origin=item.get("origin"),
+            )
+            for item in items
+        ]
+
     @classmethod
     def get_tag_description(cls, tag_name: str) -> str:
         """
@@ -0,0 +1,196 @@
+"""
+Synthetic drink catalogues for benchmarks.
+
+Items follow the shape of wines_to_add.json (name, description, price,
+category, producer and tag names) and carry the other item fields too. Every
+item gets its category's style tag plus a few descriptor tags, picked with a
+long-tailed popularity so some tags link to many items and most to few, as
+on a real menu.
+"""
+
+import random
+from typing import Any
+
+# Category name, icon, share of items, ABV range, volumes and style tags
+CATEGORIES: list[tuple[str, str, float, tuple[float, float], list[str], list[str]]] = [
+    (
+        "Wine",
+        "🍷",
+        0.35,
+        (11.0, 15.5),
+        ["750ml", "5 oz glass", "9 oz glass"],
+        [
+            "Red Wine",
+            "White Wine",
+            "Rosé",
+            "Sparkling",
+            "Cabernet Sauvignon",
+            "Merlot",
+            "Pinot Noir",
+            "Pinot Grigio",
+            "Malbec",
+            "Chardonnay",
+            "Sauvignon Blanc",
+            "Riesling",
+            "Zinfandel",
+            "Syrah",
+        ],
+    ),
+    (
+        "Beer",
+        "🍺",
+        0.30,
+        (3.5, 11.0),
+        ["12 oz", "16 oz", "20 oz"],
+        [
+            "IPA",
+            "Hazy IPA",
+            "Double IPA",
+            "Lager",
+            "Pilsner",
+            "Stout",
+            "Porter",
+            "Sour",
+            "Wheat",
+            "Amber Ale",
+            "Saison",
+        ],
+    ),
+    (
+        "Spirits",
+        "🥃",
+        0.15,
+        (35.0, 60.0),
+        ["1.5 oz", "2 oz"],
+        ["Bourbon", "Rye", "Scotch", "Gin", "Vodka", "Tequila", "Mezcal", "Rum", "Brandy"],
+    ),
+    (
+        "Cocktails",
+        "🍸",
+        0.10,
+        (8.0, 25.0),
+        ["6 oz", "8 oz"],
+        ["Classic", "Signature", "Tiki", "Spritz", "Martini", "Old Fashioned"],
+    ),
+    ("Cider", "🍏", 0.06, (4.0, 8.5), ["12 oz", "16 oz"], ["Dry Cider", "Sweet Cider", "Perry"]),
+    ("Non-Alcoholic", "🧃", 0.04, (0.0, 0.5), ["12 oz", "16 oz"], ["Mocktail", "NA Beer", "Soda"]),
+]
+
+DESCRIPTORS = [
+    "Crisp",
+    "Dry",
+    "Fruity",
+    "Bold",
+    "Smooth",
+    "Hoppy",
+    "Citrusy",
+    "Oaky",
+    "Smoky",
+    "Sweet",
+    "Spicy",
+    "Floral",
+    "Earthy",
+    "Tart",
+    "Light",
+    "Local",
+    "Organic",
+    "Seasonal",
+    "Barrel Aged",
+    "Limited Release",
+    "Staff Pick",
+    "Award Winning",
+    "Vegan",
+    "Gluten Free",
+]
+
+ORIGINS = [
+    "USA, California",
+    "USA, Oregon",
+    "USA, Kentucky",
+    "USA, Colorado",
+    "France",
+    "Italy",
+    "Spain",
+    "Germany",
+    "Belgium",
+    "Argentina",
+    "Chile",
+    "Australia",
+    "New Zealand",
+    "Scotland",
+    "Ireland",
+    "Mexico",
+    "Japan",
+]
+
+PRODUCER_WORDS = (
+    ["Sycamore", "Federal", "Quilty", "Copper", "Iron", "Stone", "River", "Oak", "Cedar"]
+    + ["Silver", "Red", "Golden", "Hidden", "Old", "North", "Blue", "Wild", "Twin"],
+    ["Lane", "Hill", "Creek", "Ridge", "Valley", "Barrel", "Works", "Cellars", "Brewing"]
+    + ["Distillery", "Estate", "Farm", "House", "Hollow", "Point", "Mill", "Gate", "Yard"],
+)
+
+TAG_COLORS = ["#3B82F6", "#EF4444", "#F59E0B", "#10B981", "#8B5CF6", "#EC4899"]
+
+
+def slugify(name: str) -> str:
+    return "".join(c if c.isalnum() else "-" for c in name.lower()).strip("-")
+
+
+def generate_catalogue(size: int, seed: int = 0) -> dict[str, Any]:
+    """
+    Generate an import payload of categories, tags and size items.
+    The same size and seed always give the same catalogue.
+
+    Items reference categories and tags by name, like wines_to_add.json.
+    """
+    rng = random.Random(seed)
+
+    categories = [
+        {"id": index, "name": name, "slug": slugify(name), "icon": icon, "sort_order": index}
+        for index, (name, icon, *_) in enumerate(CATEGORIES, start=1)
+    ]
+    tag_names = [style for *_, styles in CATEGORIES for style in styles] + DESCRIPTORS
+    tags = [
+        {
+            "id": index,
+            "name": name,
+            "slug": slugify(name),
+            "description": f"Characteristic: {name}",
+            "color": TAG_COLORS[index % len(TAG_COLORS)],
+        }
+        for index, name in enumerate(tag_names, start=1)
+    ]
+
+    producers = [f"{first} {second}" for first in PRODUCER_WORDS[0] for second in PRODUCER_WORDS[1]]
+    # Long-tailed popularity: the n-th descriptor is picked about 1/n as often
+    descriptor_weights = [1 / rank for rank in range(1, len(DESCRIPTORS) + 1)]
+    category_weights = [share for _, _, share, *_ in CATEGORIES]
+
+    items = []
+    for index in range(size):
+        name, _, _, (abv_low, abv_high), volumes, styles = rng.choices(
+            CATEGORIES, weights=category_weights
+        )[0]
+        style = rng.choice(styles)
+        producer = rng.choice(producers)
+        descriptors = set(rng.choices(DESCRIPTORS, weights=descriptor_weights, k=rng.randint(0, 4)))
+
+        items.append(
+            {
+                # The index keeps (name, category) unique
+                "name": f"{producer} {style} {index + 1}",
+                "description": f"{', '.join(sorted(descriptors)) or 'Classic'} {style.lower()} "
+                f"from {producer}",
+                "price": round(rng.uniform(4, 90), 0) - 0.01,
+                "category": name,
+                "producer": producer,
+                "origin": rng.choice(ORIGINS),
+                "abv": round(rng.uniform(abv_low, abv_high), 1),
+                "volume": rng.choice(volumes),
+                "is_published": rng.random() > 0.05,
+                "tags": [style, *sorted(descriptors)],
+            }
+        )
+
+    return {"categories": categories, "tags": tags, "items": items}
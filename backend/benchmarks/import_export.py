@@ -0,0 +1,273 @@
+"""
+Benchmark /data/export and /data/import against synthetic catalogues.
+
+Runs the API in-process against the database in DATABASE_URL, which must be
+a migrated PostgreSQL database (alembic upgrade head) whose data may be
+deleted. For each catalogue size it times, in order:
+
+    import_fresh    import the generated catalogue into an empty database
+    export_json     GET /data/export
+    export_ndjson   GET /data/export?format=ndjson
+    reimport        import the JSON export again (nothing changes)
+    import_clear    import the JSON export with clear_existing=true
+    upload_ndjson   upload the NDJSON export with clear_existing=true
+
+and reports item rows per second, peak RSS and SQL statement count.
+
+Usage (from backend/):
+    python -m benchmarks.import_export --sizes 1000 10000
+    python -m benchmarks.import_export --output results.json
+    python -m benchmarks.import_export --baseline results.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import httpx
+import orjson
+from sqlalchemy import func, select, text
+
+from app.core.config import settings
+from app.core.database import SessionLocal, count_queries, engine
+from app.core.security import create_access_token
+from app.main import app
+from app.models import Item
+from benchmarks.catalogue import generate_catalogue
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# Slowdown over the baseline reported as a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+class RssSampler:
+    """
+    Track the peak resident set size of this process while the block runs,
+    sampling /proc/self/statm from a background thread.
+    Falls back to the process-wide maximum where /proc is unavailable.
+    """
+
+    INTERVAL_SECONDS = 0.005
+
+    def __init__(self):
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    @staticmethod
+    def rss() -> int:
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.rss())
+            self._stop.wait(self.INTERVAL_SECONDS)
+
+    def __enter__(self) -> "RssSampler":
+        self.peak = self.rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.rss())
+
+
+async def measure(
+    phase: str, size: int, request: Callable[[], Awaitable[httpx.Response]]
+) -> tuple[dict[str, Any], httpx.Response]:
+    """
+    Time one request, with its peak RSS and statement count.
+    """
+    gc.collect()
+    with RssSampler() as sampler, count_queries() as queries:
+        started = time.perf_counter()
+        response = await request()
+        seconds = time.perf_counter() - started
+    response.raise_for_status()
+
+    return {
+        "size": size,
+        "phase": phase,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(size / seconds, 1),
+        "peak_rss_mb": round(sampler.peak / 2**20, 1),
+        "queries": queries.count,
+        "response_bytes": len(response.content),
+    }, response
+
+
+async def reset_database() -> None:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("TRUNCATE items, tags, categories, deleted_records RESTART IDENTITY CASCADE")
+        )
+
+
+async def run_size(client: httpx.AsyncClient, size: int, seed: int) -> list[dict[str, Any]]:
+    """
+    Run every phase for one catalogue size, starting from an empty database.
+    """
+    await reset_database()
+    # Serialize up front so request bodies aren't part of the timings
+    catalogue = orjson.dumps(generate_catalogue(size, seed))
+    json_body = {"content": catalogue, "headers": {"Content-Type": "application/json"}}
+
+    results = []
+
+    result, _ = await measure(
+        "import_fresh", size, lambda: client.post("/data/import", **json_body)
+    )
+    results.append(result)
+
+    result, export = await measure("export_json", size, lambda: client.get("/data/export"))
+    results.append(result)
+    export_body = {"content": export.content, "headers": {"Content-Type": "application/json"}}
+
+    result, ndjson = await measure(
+        "export_ndjson", size, lambda: client.get("/data/export", params={"format": "ndjson"})
+    )
+    results.append(result)
+
+    result, _ = await measure("reimport", size, lambda: client.post("/data/import", **export_body))
+    results.append(result)
+
+    result, _ = await measure(
+        "import_clear",
+        size,
+        lambda: client.post("/data/import", params={"clear_existing": True}, **export_body),
+    )
+    results.append(result)
+
+    result, _ = await measure(
+        "upload_ndjson",
+        size,
+        lambda: client.post(
+            "/data/import/upload",
+            params={"clear_existing": True},
+            files={"file": ("export.ndjson", ndjson.content)},
+        ),
+    )
+    results.append(result)
+
+    async with SessionLocal() as db:
+        imported = await db.scalar(select(func.count()).select_from(Item))
+    if imported != size:
+        raise RuntimeError(f"Expected {size} items after the run, found {imported}")
+    return results
+
+
+def print_results(results: list[dict[str, Any]]) -> None:
+    print(
+        f"{'size':>8}  {'phase':<14} {'seconds':>9} {'rows/s':>10} "
+        f"{'peak RSS MB':>12} {'queries':>8}"
+    )
+    for result in results:
+        print(
+            f"{result['size']:>8}  {result['phase']:<14} {result['seconds']:>9.3f} "
+            f"{result['rows_per_second']:>10.1f} {result['peak_rss_mb']:>12.1f} "
+            f"{result['queries']:>8}"
+        )
+
+
+def compare(
+    results: list[dict[str, Any]], baseline: list[dict[str, Any]], tolerance: float
+) -> list[str]:
+    """
+    Compare results with a baseline run.
+
+    Returns:
+        Descriptions of phases that got slower by more than tolerance or ran
+        more statements
+    """
+    previous = {(result["size"], result["phase"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["size"], result["phase"]))
+        if before is None:
+            continue
+        slowdown = result["seconds"] / before["seconds"] - 1 if before["seconds"] else 0.0
+        label = f"{result['size']} {result['phase']}"
+        if slowdown > tolerance:
+            regressions.append(
+                f"{label}: {before['seconds']:.3f}s -> {result['seconds']:.3f}s "
+                f"(+{slowdown:.0%})"
+            )
+        if result["queries"] > before["queries"]:
+            regressions.append(f"{label}: {before['queries']} -> {result['queries']} queries")
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    async with SessionLocal() as db:
+        existing = await db.scalar(select(func.count()).select_from(Item))
+    if existing and not args.force:
+        print(
+            f"The database has {existing} items and benchmarks delete all data; "
+            "pass --force to run anyway.",
+            file=sys.stderr,
+        )
+        return 2
+
+    # Keep the development query count middleware out of the way; statements
+    # are counted around each whole request instead, streamed bodies included
+    settings.ENVIRONMENT = "benchmark"
+    token = create_access_token({"sub": settings.ADMIN_USERNAME})
+    results = []
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://benchmark/api/v1",
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=None,
+    ) as client:
+        for size in args.sizes:
+            results.extend(await run_size(client, size, args.seed))
+    await reset_database()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline), args.tolerance)
+        if regressions:
+            print("\nRegressions against the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=0, help="catalogue generator seed")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with results written by --output")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="slowdown over the baseline reported as a regression (default 0.25)",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="run even if the database already has data"
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,74 @@
+"""
+Query budgets for the read endpoints.
+
+Each endpoint must run a fixed number of statements however many items, tags
+and categories it returns, so loading relationships per row (an N+1) fails
+here before it shows up as a slow menu.
+"""
+
+import httpx
+import orjson
+import pytest
+
+from app.core.database import count_queries
+from benchmarks.catalogue import generate_catalogue
+
+from .conftest import requires_database, reset_database
+
+pytestmark = [pytest.mark.anyio, requires_database]
+
+# Enough items that per-row loading would blow well past any budget
+SMALL_CATALOGUE = 5
+LARGE_CATALOGUE = 80
+
+# Statements per request, including auth and the ETag fingerprint
+QUERY_BUDGETS = {
+    "list": 4,
+    "detail": 2,
+    "export": 6,
+}
+
+
+async def seed(client: httpx.AsyncClient, size: int) -> None:
+    await reset_database()
+    response = await client.post(
+        "/data/import",
+        content=orjson.dumps(generate_catalogue(size)),
+        headers={"Content-Type": "application/json"},
+    )
+    response.raise_for_status()
+
+
+async def counted(request) -> tuple[int, httpx.Response]:
+    with count_queries() as queries:
+        response = await request
+    response.raise_for_status()
+    return queries.count, response
+
+
+async def endpoint_query_counts(client: httpx.AsyncClient, size: int) -> dict[str, int]:
+    await seed(client, size)
+
+    counts = {}
+    counts["list"], response = await counted(
+        client.get("/items", params={"published_only": "false", "page_size": 100})
+    )
+    items = response.json()["items"]
+    assert len(items) == size
+    assert all(item["tags"] and item["category"] for item in items)
+
+    counts["detail"], response = await counted(client.get(f"/items/{items[-1]['id']}"))
+    assert response.json()["tags"]
+
+    counts["export"], response = await counted(client.get("/data/export"))
+    assert len(response.json()["items"]) == size
+    return counts
+
+
+async def test_query_counts_do_not_grow_with_rows(client: httpx.AsyncClient) -> None:
+    small = await endpoint_query_counts(client, SMALL_CATALOGUE)
+    large = await endpoint_query_counts(client, LARGE_CATALOGUE)
+
+    assert large == small
+    for endpoint, budget in QUERY_BUDGETS.items():
+        assert large[endpoint] <= budget, f"{endpoint} ran {large[endpoint]} queries"